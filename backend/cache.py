@@ -0,0 +1,168 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+from pymongo import DESCENDING
+from pymongo.errors import OperationFailure, PyMongoError
+
+
+logger = logging.getLogger(__name__)
+
+# Error codes returned by a standalone mongod when a change stream is opened
+CHANGE_STREAM_UNSUPPORTED = {40573, 40415, 136}
+
+# Per-collection counters bumped by bulk writers (seed, migrations) so the
+# polling fallback notices in-place updates without hashing collections
+VERSIONS_COLLECTION = "cache_versions"
+
+
+class ResponseCache:
+    """TTL + LRU cache for read-only route responses.
+
+    Keys are tuples whose first element is the source collection name, so a
+    write to that collection can drop every cached variant derived from it.
+    Callers read ``generation(collection)`` before querying and pass it to
+    ``set``, so a response built from data read before an invalidation is
+    not cached after it.
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.stale_sets = 0
+        self._epoch = 0
+        self._generations: Dict[Hashable, int] = {}
+        self._entries: "OrderedDict[Tuple[Hashable, ...], Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: Tuple[Hashable, ...]) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def generation(self, collection: Hashable) -> int:
+        # Both counters only grow, so the sum changes whenever either does
+        return self._epoch + self._generations.get(collection, 0)
+
+    def set(self, key: Tuple[Hashable, ...], value: Any, generation: Optional[int] = None) -> None:
+        if generation is not None and generation != self.generation(key[0]):
+            self.stale_sets += 1
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, collection: Optional[str] = None) -> None:
+        if collection is None:
+            self._entries.clear()
+            self._epoch += 1
+        else:
+            self._generations[collection] = self._generations.get(collection, 0) + 1
+            for key in [k for k in self._entries if k[0] == collection]:
+                del self._entries[key]
+        self.invalidations += 1
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "stale_sets": self.stale_sets,
+            "hit_ratio": self.hits / total if total else 0.0,
+        }
+
+
+async def watch_collections(
+    db,
+    cache: ResponseCache,
+    collections: Iterable[str],
+    poll_interval: float = 5.0,
+    on_change: Optional[Callable[[str, Optional[dict]], None]] = None,
+):
+    """Invalidate ``cache`` whenever one of ``collections`` changes.
+
+    Uses a database change stream when the deployment supports it (replica set
+    or sharded cluster) and falls back to polling cheap per-collection
+    signatures (see ``collection_signature``) otherwise. ``on_change`` is
+    called after each invalidation with the collection name and the
+    change-stream event, or None when the change was only detected by
+    polling or a stream interruption.
+    """
+    collections = list(collections)
+
+    def changed(name, change=None):
+        cache.invalidate(name)
+        if on_change is not None:
+            on_change(name, change)
+
+    pipeline = [{"$match": {"ns.coll": {"$in": collections}}}]
+    while True:
+        try:
+            async with db.watch(pipeline) as stream:
+                logger.info("Response cache invalidation via change stream on %s", collections)
+                async for change in stream:
+                    changed(change["ns"]["coll"], change)
+        except OperationFailure as exc:
+            if exc.code in CHANGE_STREAM_UNSUPPORTED:
+                logger.info("Change streams unavailable, polling every %ss", poll_interval)
+            else:
+                # Don't let the task die and leave the cache on TTL-only invalidation
+                logger.warning("Change stream failed (%s), falling back to polling every %ss", exc, poll_interval)
+            await _poll_collections(db, collections, poll_interval, changed)
+            return
+        except PyMongoError as exc:
+            # Stream dropped (failover, network); anything cached meanwhile may be stale
+            logger.warning("Change stream interrupted: %s", exc)
+            for name in collections:
+                changed(name)
+            await asyncio.sleep(poll_interval)
+
+
+async def bump_cache_version(db, collection: str) -> None:
+    """Record a bulk write to ``collection`` for servers that poll."""
+    await db[VERSIONS_COLLECTION].update_one({"_id": collection}, {"$inc": {"version": 1}}, upsert=True)
+
+
+async def collection_signature(db, collection: str, versions: dict) -> tuple:
+    """Cheap change signature: count and newest _id catch inserts and
+    deletes, the bumped version catches bulk in-place updates. Both reads are
+    served from metadata or the _id index."""
+    count = await db[collection].estimated_document_count()
+    newest = await db[collection].find_one({}, {"_id": 1}, sort=[("_id", DESCENDING)])
+    return count, (newest or {}).get("_id"), versions.get(collection, 0)
+
+
+async def _poll_collections(db, collections, poll_interval: float, changed: Callable[[str], None]):
+    signatures = {}
+    while True:
+        try:
+            versions = {
+                doc["_id"]: doc.get("version", 0)
+                async for doc in db[VERSIONS_COLLECTION].find({"_id": {"$in": collections}})
+            }
+            current = {name: await collection_signature(db, name, versions) for name in collections}
+            for name in collections:
+                if name in signatures and signatures[name] != current[name]:
+                    changed(name)
+            signatures = current
+        except PyMongoError as exc:
+            logger.warning("Change poll failed: %s", exc)
+            for name in collections:
+                changed(name)
+            signatures = {}
+        await asyncio.sleep(poll_interval)
@@ -0,0 +1,245 @@
+"""Resizing image proxy with a size-bounded on-disk LRU cache.
+
+Sources are fetched once (or read from a local fixture directory) and kept
+in the cache alongside their resized variants. Decoding and encoding run in a
+process pool so large originals never stall the event loop.
+"""
+import asyncio
+import hashlib
+import io
+import logging
+import multiprocessing
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import requests
+from PIL import Image, features
+from starlette.concurrency import run_in_threadpool
+
+
+logger = logging.getLogger(__name__)
+
+# Requested widths snap up to one of these, so the cache holds a bounded set of variants
+WIDTHS = (160, 320, 480, 640, 960, 1280, 1920)
+FORMATS = {
+    "webp": ("WEBP", "image/webp"),
+    "avif": ("AVIF", "image/avif"),
+    "jpeg": ("JPEG", "image/jpeg"),
+}
+QUALITY = {"webp": 80, "avif": 60, "jpeg": 82}
+MAX_SOURCE_BYTES = 32 * 1024 * 1024
+
+
+def supported_formats() -> set:
+    formats = {"jpeg"}
+    if features.check("webp"):
+        formats.add("webp")
+    if features.check("avif"):
+        formats.add("avif")
+    return formats
+
+
+def negotiate_format(requested: Optional[str], accept: str) -> str:
+    """Pick the output format: an explicit ``fmt`` if this build can encode
+    it, otherwise the best one the client's Accept header allows."""
+    supported = supported_formats()
+    if requested in supported:
+        return requested
+    for fmt in ("avif", "webp"):
+        if fmt in supported and f"image/{fmt}" in accept:
+            return fmt
+    # An explicit webp/avif request still gets the closest modern format
+    return "webp" if requested and "webp" in supported else "jpeg"
+
+
+def snap_width(width: Optional[int]) -> Optional[int]:
+    if width is None:
+        return None
+    for allowed in WIDTHS:
+        if width <= allowed:
+            return allowed
+    return WIDTHS[-1]
+
+
+def render_variant(source: bytes, width: Optional[int], fmt: str) -> bytes:
+    """Decode, resize and re-encode an image. Runs in a worker process."""
+    image = Image.open(io.BytesIO(source))
+    if width is not None and image.width > width:
+        # Lets the JPEG decoder downscale by 1/2, 1/4 or 1/8 while decoding
+        image.draft("RGB", (width, max(1, round(image.height * width / image.width))))
+    image = image.convert("RGBA" if fmt != "jpeg" and image.mode in ("RGBA", "LA", "P") else "RGB")
+    if width is not None and image.width > width:
+        height = max(1, round(image.height * width / image.width))
+        image = image.resize((width, height), Image.LANCZOS)
+    out = io.BytesIO()
+    image.save(out, FORMATS[fmt][0], quality=QUALITY[fmt])
+    return out.getvalue()
+
+
+class DiskLRUCache:
+    """Files in ``directory`` evicted least-recently-used first once their
+    total size passes ``max_bytes``. Recency survives restarts via mtime."""
+
+    def __init__(self, directory: Path, max_bytes: int):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._size = 0
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    def load(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        files = sorted(
+            (entry for entry in os.scandir(self.directory) if entry.is_file() and not entry.name.endswith(".tmp")),
+            key=lambda entry: entry.stat().st_mtime,
+        )
+        for entry in files:
+            self._entries[entry.name] = entry.stat().st_size
+            self._size += entry.stat().st_size
+        self._unlink(self._evict())
+
+    def path(self, name: str) -> Path:
+        return self.directory / name
+
+    def get(self, name: str) -> Optional[Path]:
+        if name not in self._entries:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(name)
+        self.hits += 1
+        path = self.path(name)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            self._size -= self._entries.pop(name)
+            return None
+        return path
+
+    def _write(self, name: str, data: bytes) -> Path:
+        # File I/O only; runs in a worker thread
+        path = self.path(name)
+        tmp_path = path.with_name(name + ".tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+        return path
+
+    def _record(self, name: str, size: int) -> List[Path]:
+        # Bookkeeping stays on the event loop, the only place entries change
+        self._size += size - self._entries.pop(name, 0)
+        self._entries[name] = size
+        return self._evict()
+
+    async def put(self, name: str, data: bytes) -> Path:
+        path = await run_in_threadpool(self._write, name, data)
+        evicted = self._record(name, len(data))
+        if evicted:
+            await run_in_threadpool(self._unlink, evicted)
+        return path
+
+    async def get_or_create(self, name: str, create: Callable[[], Awaitable[bytes]]) -> Path:
+        """Return the cached file, creating it once even under concurrent requests."""
+        path = self.get(name)
+        if path is not None:
+            return path
+        if name in self._inflight:
+            return await asyncio.shield(self._inflight[name])
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[name] = future
+        try:
+            data = await create()
+            path = await self.put(name, data)
+            future.set_result(path)
+            return path
+        except BaseException as exc:
+            future.set_exception(exc)
+            # Waiters get the error; nobody else needs to retrieve it
+            future.exception()
+            raise
+        finally:
+            del self._inflight[name]
+
+    def _evict(self) -> List[Path]:
+        evicted = []
+        # The newest file stays even if it alone is over budget, so it can be served
+        while self._size > self.max_bytes and len(self._entries) > 1:
+            name, size = self._entries.popitem(last=False)
+            self._size -= size
+            evicted.append(self.path(name))
+        return evicted
+
+    @staticmethod
+    def _unlink(paths: List[Path]) -> None:
+        for path in paths:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+    def stats(self) -> dict:
+        return {"files": len(self._entries), "bytes": self._size, "max_bytes": self.max_bytes, "hits": self.hits, "misses": self.misses}
+
+
+class ImageProxy:
+    def __init__(self, cache: DiskLRUCache, source_dir: Optional[Path] = None, workers: Optional[int] = None, timeout: float = 10.0):
+        self.cache = cache
+        self.source_dir = Path(source_dir) if source_dir else None
+        self.workers = workers
+        self.timeout = timeout
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def start(self) -> None:
+        self.cache.load()
+        # Never fork the server itself: by now Motor's threads are running
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context(method))
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _fetch(self, kind: str, doc_id: str, url: str) -> bytes:
+        if self.source_dir is not None:
+            # Fixtures are named <kind>/<id>.<ext>
+            for path in sorted((self.source_dir / kind).glob(f"{doc_id}.*")):
+                return path.read_bytes()
+            raise FileNotFoundError(f"No fixture for {kind}/{doc_id} in {self.source_dir}")
+        with requests.get(url, timeout=self.timeout, stream=True) as response:
+            response.raise_for_status()
+            data = response.raw.read(MAX_SOURCE_BYTES + 1, decode_content=True)
+        if len(data) > MAX_SOURCE_BYTES:
+            raise ValueError(f"Source image larger than {MAX_SOURCE_BYTES} bytes: {url}")
+        return data
+
+    async def source(self, kind: str, doc_id: str, url: str) -> Path:
+        name = "src-" + hashlib.sha256(f"{kind}/{doc_id}\0{url}".encode()).hexdigest()
+        return await self.cache.get_or_create(name, lambda: run_in_threadpool(self._fetch, kind, doc_id, url))
+
+    async def variant(self, kind: str, doc_id: str, url: str, width: Optional[int], fmt: str) -> Path:
+        key = hashlib.sha256(f"{kind}/{doc_id}\0{url}\0{width}\0{fmt}".encode()).hexdigest()
+        name = f"{key}.{fmt}"
+
+        async def create() -> bytes:
+            source_path = await self.source(kind, doc_id, url)
+            source = await run_in_threadpool(source_path.read_bytes)
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._pool, render_variant, source, width, fmt)
+
+        return await self.cache.get_or_create(name, create)
+
+    async def variant_bytes(self, kind: str, doc_id: str, url: str, width: Optional[int], fmt: str) -> Tuple[Path, bytes]:
+        """``variant`` plus its contents, read before an eviction can remove
+        the file; a variant evicted in between is rendered again."""
+        for attempt in range(2):
+            try:
+                path = await self.variant(kind, doc_id, url, width, fmt)
+                return path, await run_in_threadpool(path.read_bytes)
+            except FileNotFoundError:
+                # Also raised for a missing fixture, which fails the same way twice
+                if attempt:
+                    raise
+                logger.info("Image %s/%s was evicted before it was read; rendering it again", kind, doc_id)
@@ -0,0 +1,103 @@
+"""Index registry for the GN Management collections.
+
+Indexes are applied idempotently at app startup and by scripts/seed_db.py.
+Run directly to apply them, or with ``--check`` to explain every route's
+query and fail if any of them plans a collection scan:
+
+    python backend/indexes.py --check
+"""
+import argparse
+import asyncio
+import os
+import sys
+from typing import Dict, List
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    "projects": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        # Category filter with the _id keyset used for pagination
+        IndexModel([("category", ASCENDING), ("_id", ASCENDING)], name="category_id"),
+    ],
+    "team": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+    ],
+    "news": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("date", DESCENDING), ("id", ASCENDING)], name="date_desc_id"),
+    ],
+    "contact_forms": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+    ],
+}
+
+# (collection, filter, sort) for every query issued by the read routes
+ROUTE_QUERIES = [
+    ("projects", {}, [("_id", 1)]),
+    ("projects", {"category": "Featured"}, [("_id", 1)]),
+    ("projects", {"id": "628-summit"}, None),
+    ("team", {}, [("_id", 1)]),
+    ("news", {}, [("date", -1), ("id", 1)]),
+    ("news", {"$or": [{"date": {"$lt": "2025-01-01"}}, {"date": "2025-01-01", "id": {"$gt": ""}}]}, [("date", -1), ("id", 1)]),
+    ("news", {"id": "singh-tower-completion"}, None),
+]
+
+
+async def ensure_indexes(db) -> None:
+    for collection, indexes in INDEXES.items():
+        await db[collection].create_indexes(indexes)
+
+
+def _plan_stages(plan) -> List[str]:
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages.extend(_plan_stages(value))
+    elif isinstance(plan, list):
+        for value in plan:
+            stages.extend(_plan_stages(value))
+    return stages
+
+
+async def check_query_plans(db) -> List[str]:
+    """Return a description of every route query whose winning plan is a COLLSCAN."""
+    failures = []
+    for collection, query, sort in ROUTE_QUERIES:
+        cursor = db[collection].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        explain = await cursor.explain()
+        stages = _plan_stages(explain["queryPlanner"]["winningPlan"])
+        if "COLLSCAN" in stages:
+            failures.append(f"{collection}.find({query}).sort({sort}): {' <- '.join(stages)}")
+    return failures
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Apply indexes and verify route query plans")
+    parser.add_argument('--check', action='store_true', help="fail if any route query plans a COLLSCAN")
+    args = parser.parse_args()
+
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+    try:
+        await ensure_indexes(db)
+        print("✅ Indexes applied")
+        if args.check:
+            failures = await check_query_plans(db)
+            for failure in failures:
+                print(f"❌ COLLSCAN: {failure}")
+            if failures:
+                sys.exit(1)
+            print("✅ All route queries use an index")
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
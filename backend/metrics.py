@@ -0,0 +1,181 @@
+"""Request, Mongo and phase timings exposed in Prometheus text format."""
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional, Sequence, Tuple
+
+from pymongo import monitoring
+
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+# Phase timings collected while a request is being handled
+_request_phases: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_phases", default=None)
+
+
+def _format_labels(names: Sequence[str], values: Tuple[str, ...], *extra: str) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(label for label in extra if label)
+    return "{%s}" % ",".join(pairs) if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[str, ...], list] = {}
+        # Mongo events arrive on Motor's executor threads
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # bucket counts, +Inf count, sum
+                series = self._series[labels] = [[0] * len(self.buckets), 0, 0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += 1
+            series[2] += value
+
+    def render(self, const: str = "") -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((labels, (list(s[0]), s[1], s[2])) for labels, s in self._series.items())
+        for labels, (counts, total, value_sum) in items:
+            for bound, count in zip(self.buckets, counts):
+                le = 'le="%s"' % bound
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, labels, const, le)} {count}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labels, labels, const, le)} {total}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, labels, const)} {value_sum}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, labels, const)} {total}")
+        return "\n".join(lines)
+
+
+class Gauge:
+    def __init__(self, name: str, help: str, labels: Sequence[str]):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float, *labels: str) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self, const: str = "") -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labels, labels, const)} {value}")
+        return "\n".join(lines)
+
+
+request_latency = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route", "status"), LATENCY_BUCKETS
+)
+response_size = Histogram(
+    "http_response_size_bytes", "HTTP response body size by route", ("method", "route"), SIZE_BUCKETS
+)
+requests_in_flight = Gauge("http_requests_in_flight", "HTTP requests currently being handled", ("method",))
+phase_latency = Histogram(
+    "http_request_phase_seconds", "Time spent per request phase (db, build, serialize)", ("route", "phase"), LATENCY_BUCKETS
+)
+mongo_latency = Histogram(
+    "mongo_command_duration_seconds", "Mongo command latency by collection", ("command", "collection", "outcome"), LATENCY_BUCKETS
+)
+
+REGISTRY = (request_latency, response_size, requests_in_flight, phase_latency, mongo_latency)
+
+
+def render_metrics() -> str:
+    # Under run.py each scrape reaches one worker; keep their series apart
+    worker = os.environ.get("WORKER_ID")
+    const = 'worker="%s"' % _escape(worker) if worker is not None else ""
+    return "\n".join(metric.render(const) for metric in REGISTRY) + "\n"
+
+
+@contextmanager
+def track_phase(phase: str):
+    """Attribute the time spent in the block to ``phase`` of the current request."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        phases = _request_phases.get()
+        if phases is not None:
+            phases[phase] = phases.get(phase, 0.0) + time.perf_counter() - start
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = {"code": 500, "size": 0}
+        phases: Dict[str, float] = {}
+        token = _request_phases.set(phases)
+        requests_in_flight.inc(1, method)
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            elif message["type"] == "http.response.body":
+                status["size"] += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            requests_in_flight.inc(-1, method)
+            _request_phases.reset(token)
+            # Label by route template, known only once routing has happened
+            route = getattr(scope.get("route"), "path", "unmatched")
+            request_latency.observe(elapsed, method, route, str(status["code"]))
+            response_size.observe(status["size"], method, route)
+            for phase, seconds in phases.items():
+                phase_latency.observe(seconds, route, phase)
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """Times every Mongo command by collection; pass to ``AsyncIOMotorClient(event_listeners=[...])``."""
+
+    def __init__(self):
+        self._collections: Dict[Tuple[object, int], str] = {}
+        self._lock = threading.Lock()
+
+    def started(self, event):
+        collection = event.command.get(event.command_name)
+        if event.command_name == "getMore":
+            collection = event.command.get("collection")
+        with self._lock:
+            self._collections[(event.connection_id, event.request_id)] = (
+                collection if isinstance(collection, str) else ""
+            )
+
+    def _finish(self, event, outcome: str):
+        with self._lock:
+            collection = self._collections.pop((event.connection_id, event.request_id), "")
+        mongo_latency.observe(event.duration_micros / 1e6, event.command_name, collection, outcome)
+
+    def succeeded(self, event):
+        self._finish(event, "success")
+
+    def failed(self, event):
+        self._finish(event, "failure")
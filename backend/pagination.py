@@ -0,0 +1,57 @@
+import base64
+import json
+from typing import Iterable, List, Optional, Type
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import HTTPException
+from pydantic import BaseModel
+
+
+def encode_cursor(values: list) -> str:
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> list:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or len(values) != size or not all(isinstance(v, str) for v in values):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def object_id_from_cursor(cursor: str) -> ObjectId:
+    (value,) = decode_cursor(cursor, 1)
+    try:
+        return ObjectId(value)
+    except InvalidId:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def parse_fields(fields: Optional[str], model: Type[BaseModel]) -> Optional[List[str]]:
+    """Turn a ``fields=a,b,c`` parameter into a list of model fields, in
+    model order. ``id`` is always included so clients can link to details."""
+    if not fields:
+        return None
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested - model.model_fields.keys()
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    requested.add("id")
+    return [name for name in model.model_fields if name in requested]
+
+
+def mongo_projection(fields: Optional[List[str]], required: Iterable[str] = ()) -> dict:
+    """Projection for ``fields`` plus any keys needed to build the next cursor."""
+    if fields is None:
+        return {} if "_id" in required else {"_id": 0}
+    projection = {name: 1 for name in fields}
+    for name in required:
+        projection[name] = 1
+    if "_id" not in required:
+        projection["_id"] = 0
+    return projection
@@ -0,0 +1,107 @@
+import gzip
+import hashlib
+from typing import Any, Optional
+
+from pydantic import TypeAdapter
+from starlette.requests import Request
+from starlette.responses import Response
+
+try:
+    import brotli
+except ImportError:  # optional, gzip is always available
+    brotli = None
+
+
+# Bodies smaller than this are not worth compressing
+COMPRESS_MIN_SIZE = 1024
+# Each content-coding is its own representation and needs its own strong ETag
+ETAG_SUFFIXES = {"gzip": "-gz", "br": "-br"}
+
+
+class EncodedResponse:
+    """A JSON body encoded once per resource version, with its ETag and
+    precompressed variants."""
+
+    __slots__ = ("body", "etag", "gzip", "br", "headers")
+
+    def __init__(self, body: bytes, headers: Optional[dict] = None):
+        self.body = body
+        self.headers = headers or {}
+        self.etag = '"%s"' % hashlib.sha256(body).hexdigest()[:32]
+        self.gzip = None
+        self.br = None
+        if len(body) >= COMPRESS_MIN_SIZE:
+            self.gzip = gzip.compress(body, compresslevel=6, mtime=0)
+            if brotli is not None:
+                self.br = brotli.compress(body, quality=9)
+
+    @classmethod
+    def from_data(cls, adapter: TypeAdapter, data: Any, headers: Optional[dict] = None) -> "EncodedResponse":
+        return cls(adapter.dump_json(data), headers)
+
+    @classmethod
+    def precompressed(cls, body: bytes, gzip_body: Optional[bytes] = None, br_body: Optional[bytes] = None,
+                      headers: Optional[dict] = None) -> "EncodedResponse":
+        """Wrap variants that were compressed ahead of time, e.g. by the snapshot export."""
+        encoded = cls.__new__(cls)
+        encoded.body = body
+        encoded.headers = headers or {}
+        encoded.etag = '"%s"' % hashlib.sha256(body).hexdigest()[:32]
+        encoded.gzip = gzip_body
+        encoded.br = br_body
+        return encoded
+
+
+def coded_etag(etag: str, encoding: str) -> str:
+    return etag[:-1] + ETAG_SUFFIXES[encoding] + '"'
+
+
+def _base_etag(tag: str) -> str:
+    tag = tag.removeprefix("W/")
+    for suffix in ETAG_SUFFIXES.values():
+        if tag.endswith(suffix + '"'):
+            return tag[:-len(suffix) - 1] + '"'
+    return tag
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison, as RFC 9110 requires for If-None-Match; any coding of
+    # the same body is the same version for revalidation
+    etag = _base_etag(etag)
+    tags = (tag.strip() for tag in if_none_match.split(","))
+    return any(_base_etag(tag) == etag for tag in tags)
+
+
+def accepted_encodings(accept_encoding: str) -> set:
+    encodings = set()
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name or params.strip().replace(" ", "").lower() in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        encodings.add(name)
+    return encodings
+
+
+def encoded_response(request: Request, encoded: EncodedResponse, max_age: int = 60) -> Response:
+    body, encoding = encoded.body, None
+    encodings = accepted_encodings(request.headers.get("accept-encoding", ""))
+    if encoded.br is not None and "br" in encodings:
+        body, encoding = encoded.br, "br"
+    elif encoded.gzip is not None and "gzip" in encodings:
+        body, encoding = encoded.gzip, "gzip"
+
+    headers = {
+        "ETag": coded_etag(encoded.etag, encoding) if encoding else encoded.etag,
+        "Cache-Control": f"public, max-age={max_age}",
+        "Vary": "Accept-Encoding",
+        **encoded.headers,
+    }
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag_matches(if_none_match, encoded.etag):
+        return Response(status_code=304, headers=headers)
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
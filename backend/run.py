@@ -0,0 +1,144 @@
+"""Multi-worker launcher for the API.
+
+Binds the listening socket once, then forks one uvicorn worker per slot
+(default: one per CPU core). Each worker imports ``server`` itself, so it gets
+its own event loop and Motor client, created by the app's lifespan handler.
+Crashed workers are restarted in the same slot. On SIGTERM or SIGINT every
+worker stops reporting ready, finishes in-flight requests and drains its
+contact queue before exiting. Each scrape of /api/metrics or a stats route
+reaches one worker; their series carry a ``worker`` label to tell them apart:
+
+    python run.py --port 8001 --workers 8
+"""
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+from pathlib import Path
+
+import uvicorn
+
+
+logger = logging.getLogger("run")
+
+
+class DrainingServer(uvicorn.Server):
+    def __init__(self, config: uvicorn.Config, drain_delay: float):
+        super().__init__(config)
+        self.drain_delay = drain_delay
+
+    def handle_exit(self, sig, frame):
+        server = sys.modules.get("server")
+        if server is not None and not server.app.state.draining:
+            # Fail readiness first so the load balancer stops routing here
+            server.app.state.draining = True
+            if self.drain_delay > 0:
+                asyncio.get_event_loop().call_later(self.drain_delay, super().handle_exit, sig, None)
+                return
+        super().handle_exit(sig, frame)
+
+
+def bind_socket(host: str, port: int, backlog: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(slot: int, sock: socket.socket, args) -> None:
+    os.environ["WORKER_ID"] = str(slot)
+    # Lets the app size per-worker resources (image pool) for the whole host
+    os.environ["WEB_CONCURRENCY"] = str(args.workers)
+    # The parent's handlers must not fire in the child; uvicorn installs its own
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, signal.SIG_DFL)
+    config = uvicorn.Config(
+        "server:app",
+        lifespan="on",
+        backlog=args.backlog,
+        timeout_keep_alive=args.keep_alive,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        limit_concurrency=args.limit_concurrency,
+        access_log=args.access_log,
+    )
+    DrainingServer(config, args.drain_delay).run(sockets=[sock])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the API with several worker processes")
+    parser.add_argument('--host', default=os.environ.get('HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=int(os.environ.get('PORT', '8001')))
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('WEB_CONCURRENCY', os.cpu_count() or 1)))
+    parser.add_argument('--backlog', type=int, default=2048)
+    parser.add_argument('--keep-alive', type=int, default=5, help="seconds to hold idle keep-alive connections")
+    parser.add_argument('--graceful-timeout', type=int, default=30, help="seconds to wait for in-flight requests")
+    parser.add_argument('--drain-delay', type=float, default=0.0,
+                        help="seconds to keep serving after SIGTERM while readiness reports 503")
+    parser.add_argument('--limit-concurrency', type=int, default=None)
+    parser.add_argument('--access-log', action='store_true')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    os.chdir(Path(__file__).parent)
+    sys.path.insert(0, str(Path(__file__).parent))
+
+    sock = bind_socket(args.host, args.port, args.backlog)
+    workers = {}
+    stopping = False
+
+    def spawn(slot: int) -> None:
+        pid = os.fork()
+        if pid == 0:
+            try:
+                run_worker(slot, sock, args)
+            finally:
+                os._exit(0)
+        workers[pid] = slot
+        logger.info("Started worker %d (pid %d)", slot, pid)
+
+    def stop(sig, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in workers:
+            os.kill(pid, signal.SIGTERM)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for slot in range(args.workers):
+        spawn(slot)
+    logger.info("Serving on %s:%d with %d workers", args.host, args.port, args.workers)
+
+    deadline = None
+    while workers:
+        if stopping and deadline is None:
+            deadline = time.monotonic() + args.graceful_timeout + args.drain_delay + 15
+        if deadline is not None and time.monotonic() > deadline:
+            for pid in workers:
+                logger.warning("Worker pid %d did not exit in time; killing it", pid)
+                os.kill(pid, signal.SIGKILL)
+            deadline = float("inf")
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            break
+        if pid == 0:
+            time.sleep(0.2)
+            continue
+        slot = workers.pop(pid)
+        if not stopping:
+            logger.warning("Worker %d (pid %d) exited with status %d; restarting", slot, pid, status)
+            time.sleep(1)
+            spawn(slot)
+    sock.close()
+
+
+if __name__ == "__main__":
+    main()
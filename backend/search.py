@@ -0,0 +1,230 @@
+"""In-process BM25 search over projects and news.
+
+The index is built from Mongo at startup. Change-stream events re-fetch just
+the documents they name; changes seen only by polling (or too many at once)
+rescan the collection, and only documents whose searchable text changed are
+re-tokenized. The last query term is prefix-matched so the
+endpoint can back a typeahead.
+"""
+import asyncio
+import heapq
+import logging
+import math
+import re
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from pymongo.errors import PyMongoError
+
+
+logger = logging.getLogger(__name__)
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset("a an and are as at be by for from in is it of on or the to with".split())
+# How many index terms a trailing prefix may expand to
+MAX_PREFIX_EXPANSIONS = 50
+# Past this many pending document changes a full rescan is cheaper
+MAX_INCREMENTAL = 1000
+DOCUMENT_OPERATIONS = frozenset(("insert", "update", "replace", "delete"))
+
+# collection -> (result kind, title field, snippet field, {field: weight})
+SEARCHABLE = {
+    "projects": ("project", "name", "address", {"name": 3.0, "address": 1.5, "description": 1.0}),
+    "news": ("news", "title", "short_content", {"title": 3.0, "short_content": 1.5, "content": 1.0}),
+}
+
+DocKey = Tuple[str, str]
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in TOKEN_RE.findall(text.lower()) if token not in STOPWORDS]
+
+
+class SearchIndex:
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[DocKey, float]] = defaultdict(dict)
+        self._doc_terms: Dict[DocKey, List[str]] = {}
+        self._doc_len: Dict[DocKey, float] = {}
+        self._docs: Dict[DocKey, Tuple[str, Optional[str]]] = {}
+        self._fingerprints: Dict[DocKey, int] = {}
+        self._total_len = 0.0
+        self._sorted_terms: Optional[List[str]] = None
+        self._dirty: set = set()
+        self._changed: Dict[str, set] = defaultdict(set)
+        # (collection, Mongo _id) -> index key, so deletes can be resolved
+        self._object_keys: Dict[Tuple[str, object], DocKey] = {}
+        self.built = False
+        self._wake = asyncio.Event()
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def add(self, kind: str, doc: dict, weights: Dict[str, float], title_field: str, snippet_field: str) -> None:
+        key = (kind, doc["id"])
+        texts = tuple(doc.get(field) or "" for field in weights)
+        fingerprint = hash(texts)
+        if self._fingerprints.get(key) == fingerprint:
+            return
+        self.remove(key)
+
+        frequencies: Dict[str, float] = defaultdict(float)
+        for (field, weight), text in zip(weights.items(), texts):
+            for token in tokenize(text):
+                frequencies[token] += weight
+        for term, frequency in frequencies.items():
+            if term not in self._postings:
+                self._sorted_terms = None
+            self._postings[term][key] = frequency
+        length = sum(frequencies.values())
+        self._doc_terms[key] = list(frequencies)
+        self._doc_len[key] = length
+        self._total_len += length
+        self._docs[key] = (doc.get(title_field) or "", doc.get(snippet_field))
+        self._fingerprints[key] = fingerprint
+
+    def remove(self, key: DocKey) -> None:
+        terms = self._doc_terms.pop(key, None)
+        if terms is None:
+            return
+        for term in terms:
+            postings = self._postings[term]
+            del postings[key]
+            if not postings:
+                del self._postings[term]
+                self._sorted_terms = None
+        self._total_len -= self._doc_len.pop(key)
+        del self._docs[key]
+        del self._fingerprints[key]
+
+    def _expand_prefix(self, prefix: str) -> List[str]:
+        if self._sorted_terms is None:
+            self._sorted_terms = sorted(self._postings)
+        terms = []
+        i = bisect_left(self._sorted_terms, prefix)
+        while i < len(self._sorted_terms) and len(terms) < MAX_PREFIX_EXPANSIONS:
+            term = self._sorted_terms[i]
+            if not term.startswith(prefix):
+                break
+            terms.append(term)
+            i += 1
+        return terms
+
+    def search(self, query: str, limit: int = 10, kind: Optional[str] = None, prefix: bool = True) -> List[dict]:
+        tokens = tokenize(query)
+        if not tokens or not self._docs:
+            return []
+        # The last term may still be being typed
+        query_terms = [[token] for token in tokens[:-1]]
+        query_terms.append(self._expand_prefix(tokens[-1]) if prefix else [tokens[-1]])
+
+        doc_count = len(self._docs)
+        avg_len = self._total_len / doc_count
+        scores: Dict[DocKey, float] = defaultdict(float)
+        for alternatives in query_terms:
+            # For an expanded prefix, a document scores for its best-matching completion
+            best: Dict[DocKey, float] = {}
+            for term in alternatives:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for key, frequency in postings.items():
+                    if kind is not None and key[0] != kind:
+                        continue
+                    norm = self.k1 * (1 - self.b + self.b * self._doc_len[key] / avg_len)
+                    score = idf * frequency * (self.k1 + 1) / (frequency + norm)
+                    if score > best.get(key, 0.0):
+                        best[key] = score
+            for key, score in best.items():
+                scores[key] += score
+
+        top = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        return [
+            {"kind": key[0], "id": key[1], "title": self._docs[key][0], "snippet": self._docs[key][1], "score": round(score, 4)}
+            for key, score in top
+        ]
+
+    def _index_document(self, collection: str, doc: dict) -> DocKey:
+        kind, title_field, snippet_field, weights = SEARCHABLE[collection]
+        key = (kind, doc["id"])
+        previous = self._object_keys.get((collection, doc["_id"]))
+        if previous is not None and previous != key:
+            # The document's id itself changed
+            self.remove(previous)
+        self._object_keys[(collection, doc["_id"])] = key
+        self.add(kind, doc, weights, title_field, snippet_field)
+        return key
+
+    @staticmethod
+    def _projection(collection: str) -> dict:
+        _, title_field, snippet_field, weights = SEARCHABLE[collection]
+        return {"_id": 1, "id": 1, title_field: 1, snippet_field: 1, **{field: 1 for field in weights}}
+
+    async def refresh(self, db, collection: str) -> None:
+        """Re-sync one collection, re-indexing only documents that changed."""
+        kind = SEARCHABLE[collection][0]
+        self._changed.pop(collection, None)
+        seen = set()
+        object_ids = set()
+        async for doc in db[collection].find({"id": {"$exists": True}}, self._projection(collection)):
+            seen.add(self._index_document(collection, doc))
+            object_ids.add(doc["_id"])
+        for key in [key for key in self._docs if key[0] == kind and key not in seen]:
+            self.remove(key)
+        for object_key in [k for k in self._object_keys if k[0] == collection and k[1] not in object_ids]:
+            del self._object_keys[object_key]
+
+    async def refresh_documents(self, db, collection: str, object_ids: set) -> None:
+        """Re-fetch just the documents a change stream reported."""
+        found = set()
+        query = {"_id": {"$in": list(object_ids)}, "id": {"$exists": True}}
+        async for doc in db[collection].find(query, self._projection(collection)):
+            self._index_document(collection, doc)
+            found.add(doc["_id"])
+        for object_id in object_ids - found:
+            key = self._object_keys.pop((collection, object_id), None)
+            if key is not None:
+                self.remove(key)
+
+    def mark_dirty(self, collection: str, change: Optional[dict] = None) -> None:
+        """Note a change to ``collection``. A change-stream event naming one
+        document queues just that document; anything else (polling, drops,
+        interrupted streams) queues a full rescan."""
+        if collection not in SEARCHABLE:
+            return
+        if change is not None and change.get("operationType") in DOCUMENT_OPERATIONS and collection not in self._dirty:
+            pending = self._changed[collection]
+            pending.add(change["documentKey"]["_id"])
+            if len(pending) > MAX_INCREMENTAL:
+                self._dirty.add(collection)
+        else:
+            self._dirty.add(collection)
+        self._wake.set()
+
+    async def run(self, db, debounce: float = 1.0) -> None:
+        """Build the index, then refresh collections as they are marked dirty."""
+        self._dirty.update(SEARCHABLE)
+        while True:
+            while self._dirty or self._changed:
+                if self._dirty:
+                    collection = self._dirty.pop()
+                    refresh = self.refresh(db, collection)
+                else:
+                    collection, object_ids = self._changed.popitem()
+                    refresh = self.refresh_documents(db, collection, object_ids)
+                try:
+                    await refresh
+                except PyMongoError as exc:
+                    logger.warning("Search index refresh of %s failed: %s", collection, exc)
+                    self._dirty.add(collection)
+                    await asyncio.sleep(debounce)
+            if not self.built:
+                self.built = True
+                logger.info("Search index holds %d documents", len(self))
+            self._wake.clear()
+            await self._wake.wait()
+            # Coalesce bursts of writes, e.g. a reseed, into one refresh
+            await asyncio.sleep(debounce)
@@ -1,28 +1,167 @@
-from fastapi import FastAPI, APIRouter, HTTPException
+from fastapi import FastAPI, APIRouter, HTTPException, Query, Request, Response
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import PlainTextResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import PyMongoError
 import os
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field, ConfigDict, EmailStr
-from typing import List, Optional
+from pydantic import BaseModel, Field, ConfigDict, EmailStr, TypeAdapter
+from typing import Any, Dict, List, Optional
 import uuid
 from datetime import datetime, timezone
+import asyncio
+from contextlib import asynccontextmanager
+
+from cache import ResponseCache, watch_collections
+from indexes import ensure_indexes
+from metrics import MetricsMiddleware, MongoCommandListener, render_metrics, track_phase
+from precomputed import EncodedResponse, encoded_response, etag_matches
+from write_queue import QueueFull, WriteBehindQueue
+from static_files import CachedFile, ranged_file_response
+from search import SearchIndex
+from snapshots import SnapshotStore
+from images import DiskLRUCache, ImageProxy, negotiate_format, snap_width
+from PIL import UnidentifiedImageError
+import requests
+from pagination import encode_cursor, decode_cursor, object_id_from_cursor, parse_fields, mongo_projection
 
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
+# MongoDB connection, created per worker process in the lifespan handler
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+client: Optional[AsyncIOMotorClient] = None
+db = None
+
+
+def create_client() -> AsyncIOMotorClient:
+    return AsyncIOMotorClient(
+        mongo_url,
+        # tz_aware so stored dates serialize as UTC, as the models' defaults do
+        tz_aware=True,
+        event_listeners=[MongoCommandListener()],
+        maxPoolSize=int(os.environ.get('MONGO_MAX_POOL_SIZE', '100')),
+        minPoolSize=int(os.environ.get('MONGO_MIN_POOL_SIZE', '10')),
+        maxIdleTimeMS=int(os.environ.get('MONGO_MAX_IDLE_TIME_MS', '300000')),
+        serverSelectionTimeoutMS=int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', '5000')),
+        connectTimeoutMS=int(os.environ.get('MONGO_CONNECT_TIMEOUT_MS', '5000')),
+        socketTimeoutMS=int(os.environ.get('MONGO_SOCKET_TIMEOUT_MS', '20000')),
+        waitQueueTimeoutMS=int(os.environ.get('MONGO_WAIT_QUEUE_TIMEOUT_MS', '5000')),
+    )
+
+
+async def prewarm_pool(client: AsyncIOMotorClient, connections: int) -> None:
+    """Open ``connections`` pooled sockets up front so the first requests
+    after a (re)start don't pay for TCP/TLS handshakes."""
+    try:
+        await asyncio.gather(*(client.admin.command("ping") for _ in range(max(connections, 1))))
+    except PyMongoError as exc:
+        logger.warning("Could not pre-warm the Mongo pool: %s", exc)
+
+# In-process cache for content that only changes on reseed
+response_cache = ResponseCache(
+    maxsize=int(os.environ.get('RESPONSE_CACHE_SIZE', '256')),
+    ttl=float(os.environ.get('RESPONSE_CACHE_TTL', '300')),
+)
+CACHED_COLLECTIONS = ("projects", "team", "news")
+
+search_index = SearchIndex()
+
+# Pre-rendered responses from scripts/export_snapshots.py; Mongo serves anything missing
+snapshot_store = SnapshotStore(Path(os.environ['SNAPSHOT_DIR'])) if os.environ.get('SNAPSHOT_DIR') else None
+
+# Resized image variants, cached on disk. Each run.py worker keeps its own
+# directory and share of the budget, so no worker evicts files another serves
+image_cache_dir = Path(os.environ.get('IMAGE_CACHE_DIR', ROOT_DIR / 'image_cache'))
+if os.environ.get('WORKER_ID') is not None:
+    image_cache_dir = image_cache_dir / f"worker-{os.environ['WORKER_ID']}"
+image_proxy = ImageProxy(
+    DiskLRUCache(
+        image_cache_dir,
+        max_bytes=int(os.environ.get('IMAGE_CACHE_MAX_BYTES', str(512 * 1024 * 1024))) // int(os.environ.get('WEB_CONCURRENCY', '1')),
+    ),
+    source_dir=os.environ.get('IMAGE_SOURCE_DIR') or None,
+    # Share the cores between run.py's workers instead of cpu_count pools each
+    workers=int(os.environ.get('IMAGE_WORKERS') or max(1, (os.cpu_count() or 1) // int(os.environ.get('WEB_CONCURRENCY', '1')))),
+)
+IMAGE_KINDS = {"project": "projects", "team": "team", "news": "news"}
+# image_url per (collection, id), kept apart so grid renders don't evict content responses
+image_url_cache = ResponseCache(
+    maxsize=int(os.environ.get('IMAGE_URL_CACHE_SIZE', '4096')),
+    ttl=float(os.environ.get('RESPONSE_CACHE_TTL', '300')),
+)
+
+
+def collection_changed(collection: str, change: Optional[dict] = None) -> None:
+    image_url_cache.invalidate(collection)
+    search_index.mark_dirty(collection, change)
+
+# Contact submissions are acknowledged once spooled and written in batches
+CONTACT_WRITE_BEHIND = os.environ.get('CONTACT_WRITE_BEHIND', 'true').lower() == 'true'
+contact_queue: Optional[WriteBehindQueue] = None
+
+
+def worker_stats(stats: dict) -> dict:
+    # run.py workers share the port, so say which one answered
+    return {"worker": os.environ.get('WORKER_ID'), **stats}
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global client, db, contact_queue
+    app.state.ready = False
+    app.state.draining = False
+
+    client = create_client()
+    db = client[os.environ['DB_NAME']]
+    await prewarm_pool(client, int(os.environ.get('MONGO_MIN_POOL_SIZE', '10')))
+    try:
+        await ensure_indexes(db)
+    except PyMongoError as exc:
+        logger.warning("Could not ensure indexes: %s", exc)
+
+    cache_watcher = asyncio.create_task(
+        watch_collections(
+            db,
+            response_cache,
+            CACHED_COLLECTIONS,
+            poll_interval=float(os.environ.get('RESPONSE_CACHE_POLL_INTERVAL', '5')),
+            on_change=collection_changed,
+        )
+    )
+    search_indexer = asyncio.create_task(search_index.run(db))
+    image_proxy.start()
+    contact_queue = WriteBehindQueue(
+        db.contact_forms,
+        Path(os.environ.get('CONTACT_SPOOL_PATH', ROOT_DIR / 'spool' / 'contact_forms.jsonl')),
+        # Each run.py worker slot prefers its own spool and replays it after a restart
+        slot=os.environ.get('WORKER_ID'),
+        batch_size=int(os.environ.get('CONTACT_BATCH_SIZE', '100')),
+        flush_interval=float(os.environ.get('CONTACT_FLUSH_INTERVAL', '0.5')),
+        max_pending=int(os.environ.get('CONTACT_MAX_PENDING', '10000')),
+    )
+    if CONTACT_WRITE_BEHIND:
+        await contact_queue.start()
+    app.state.ready = True
+
+    yield
+
+    # uvicorn has already stopped accepting and waited for in-flight requests
+    app.state.ready = False
+    cache_watcher.cancel()
+    search_indexer.cancel()
+    image_proxy.shutdown()
+    if CONTACT_WRITE_BEHIND:
+        await contact_queue.drain()
+    client.close()
+
 
 # Create the main app without a prefix
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -77,6 +216,13 @@ class ContactForm(BaseModel):
     message: str
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
+class SearchResult(BaseModel):
+    kind: str  # project, news
+    id: str
+    title: str
+    snippet: Optional[str] = None
+    score: float
+
 class ContactFormCreate(BaseModel):
     name: str
     email: EmailStr
@@ -86,6 +232,44 @@ class ContactFormCreate(BaseModel):
     message: str
 
 
+# Serializers for pre-encoded responses
+document_adapter = TypeAdapter(Dict[str, Any])
+document_list_adapter = TypeAdapter(List[Dict[str, Any]])
+response_fields = {model: tuple(model.model_fields) for model in (Project, TeamMember, NewsArticle)}
+
+
+def response_document(doc: dict, model) -> dict:
+    """Build a response body straight from a stored document.
+
+    Documents are validated when they are written, so only rows that predate
+    the created_at migration (string or missing timestamps) go through the
+    model again.
+    """
+    created_at = doc.get('created_at')
+    if isinstance(created_at, datetime):
+        return {name: doc.get(name) for name in response_fields[model]}
+    if isinstance(created_at, str):
+        doc['created_at'] = datetime.fromisoformat(created_at)
+    return model(**doc).model_dump()
+
+
+def encode_page(docs: list, model, fields: Optional[List[str]], next_cursor: Optional[str]) -> EncodedResponse:
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    with track_phase("build"):
+        if fields is None:
+            items = [response_document(doc, model) for doc in docs]
+        else:
+            items = [{name: doc.get(name) for name in fields} for doc in docs]
+    with track_phase("serialize"):
+        return EncodedResponse.from_data(document_list_adapter, items, headers)
+
+
+async def snapshot_lookup(request: Request) -> Optional[EncodedResponse]:
+    if snapshot_store is None:
+        return None
+    return await snapshot_store.get(request.url.path, request.query_params.multi_items())
+
+
 # Routes
 @api_router.get("/")
 async def root():
@@ -93,61 +277,198 @@ async def root():
 
 # Projects Routes
 @api_router.get("/projects", response_model=List[Project])
-async def get_projects(category: Optional[str] = None):
+async def get_projects(
+    request: Request,
+    category: Optional[str] = None,
+    limit: int = Query(1000, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+):
+    snapshot = await snapshot_lookup(request)
+    if snapshot is not None:
+        return encoded_response(request, snapshot)
+
+    key = ("projects", "list", category, limit, cursor, fields)
+    cached = response_cache.get(key)
+    if cached is not None:
+        return encoded_response(request, cached)
+    generation = response_cache.generation("projects")
+
+    selected = parse_fields(fields, Project)
     query = {} if not category else {"category": category}
-    projects = await db.projects.find(query, {"_id": 0}).to_list(1000)
+    if cursor:
+        query["_id"] = {"$gt": object_id_from_cursor(cursor)}
+    # Keyset pagination on _id keeps insertion order and needs no extra index
+    with track_phase("db"):
+        projects = await db.projects.find(query, mongo_projection(selected, ["_id"])).sort("_id", 1).to_list(limit + 1)
     
+    next_cursor = None
+    if len(projects) > limit:
+        projects = projects[:limit]
+        next_cursor = encode_cursor([str(projects[-1]["_id"])])
     for project in projects:
-        if isinstance(project.get('created_at'), str):
-            project['created_at'] = datetime.fromisoformat(project['created_at'])
+        del project["_id"]
     
-    return projects
+    encoded = encode_page(projects, Project, selected, next_cursor)
+    response_cache.set(key, encoded, generation)
+    return encoded_response(request, encoded)
 
 @api_router.get("/projects/{project_id}", response_model=Project)
-async def get_project(project_id: str):
-    project = await db.projects.find_one({"id": project_id}, {"_id": 0})
+async def get_project(request: Request, project_id: str):
+    snapshot = await snapshot_lookup(request)
+    if snapshot is not None:
+        return encoded_response(request, snapshot)
+
+    key = ("projects", "detail", project_id)
+    cached = response_cache.get(key)
+    if cached is not None:
+        return encoded_response(request, cached)
+    generation = response_cache.generation("projects")
+
+    with track_phase("db"):
+        project = await db.projects.find_one({"id": project_id}, {"_id": 0})
     
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    if isinstance(project.get('created_at'), str):
-        project['created_at'] = datetime.fromisoformat(project['created_at'])
-    
-    return project
+    with track_phase("build"):
+        project = response_document(project, Project)
+    with track_phase("serialize"):
+        encoded = EncodedResponse.from_data(document_adapter, project)
+    response_cache.set(key, encoded, generation)
+    return encoded_response(request, encoded)
 
 # Team Routes
 @api_router.get("/team", response_model=List[TeamMember])
-async def get_team():
-    team = await db.team.find({}, {"_id": 0}).to_list(100)
-    
-    for member in team:
-        if isinstance(member.get('created_at'), str):
-            member['created_at'] = datetime.fromisoformat(member['created_at'])
+async def get_team(request: Request):
+    snapshot = await snapshot_lookup(request)
+    if snapshot is not None:
+        return encoded_response(request, snapshot)
+
+    key = ("team", "list")
+    cached = response_cache.get(key)
+    if cached is not None:
+        return encoded_response(request, cached)
+    generation = response_cache.generation("team")
+
+    with track_phase("db"):
+        team = await db.team.find({}, {"_id": 0}).sort("_id", 1).to_list(100)
     
-    return team
+    encoded = encode_page(team, TeamMember, None, None)
+    response_cache.set(key, encoded, generation)
+    return encoded_response(request, encoded)
 
 # News Routes
 @api_router.get("/news", response_model=List[NewsArticle])
-async def get_news():
-    news = await db.news.find({}, {"_id": 0}).sort("date", -1).to_list(100)
+async def get_news(
+    request: Request,
+    limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+):
+    snapshot = await snapshot_lookup(request)
+    if snapshot is not None:
+        return encoded_response(request, snapshot)
+
+    key = ("news", "list", limit, cursor, fields)
+    cached = response_cache.get(key)
+    if cached is not None:
+        return encoded_response(request, cached)
+    generation = response_cache.generation("news")
+
+    selected = parse_fields(fields, NewsArticle)
+    query = {}
+    if cursor:
+        date, article_id = decode_cursor(cursor, 2)
+        query["$or"] = [{"date": {"$lt": date}}, {"date": date, "id": {"$gt": article_id}}]
+    with track_phase("db"):
+        news = await db.news.find(query, mongo_projection(selected, ["date", "id"])).sort([("date", -1), ("id", 1)]).to_list(limit + 1)
     
-    for article in news:
-        if isinstance(article.get('created_at'), str):
-            article['created_at'] = datetime.fromisoformat(article['created_at'])
+    next_cursor = None
+    if len(news) > limit:
+        news = news[:limit]
+        next_cursor = encode_cursor([news[-1]["date"], news[-1]["id"]])
     
-    return news
+    encoded = encode_page(news, NewsArticle, selected, next_cursor)
+    response_cache.set(key, encoded, generation)
+    return encoded_response(request, encoded)
 
 @api_router.get("/news/{article_id}", response_model=NewsArticle)
-async def get_article(article_id: str):
-    article = await db.news.find_one({"id": article_id}, {"_id": 0})
+async def get_article(request: Request, article_id: str):
+    snapshot = await snapshot_lookup(request)
+    if snapshot is not None:
+        return encoded_response(request, snapshot)
+
+    key = ("news", "detail", article_id)
+    cached = response_cache.get(key)
+    if cached is not None:
+        return encoded_response(request, cached)
+    generation = response_cache.generation("news")
+
+    with track_phase("db"):
+        article = await db.news.find_one({"id": article_id}, {"_id": 0})
     
     if not article:
         raise HTTPException(status_code=404, detail="Article not found")
     
-    if isinstance(article.get('created_at'), str):
-        article['created_at'] = datetime.fromisoformat(article['created_at'])
-    
-    return article
+    with track_phase("build"):
+        article = response_document(article, NewsArticle)
+    with track_phase("serialize"):
+        encoded = EncodedResponse.from_data(document_adapter, article)
+    response_cache.set(key, encoded, generation)
+    return encoded_response(request, encoded)
+
+# Search Route
+@api_router.get("/search", response_model=List[SearchResult])
+async def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    kind: Optional[str] = Query(None, pattern="^(project|news)$"),
+    limit: int = Query(10, ge=1, le=50),
+):
+    return search_index.search(q, limit=limit, kind=kind)
+
+# Health Routes
+@api_router.get("/health/live")
+async def liveness():
+    return {"status": "ok"}
+
+@api_router.get("/health/ready")
+async def readiness():
+    if not app.state.ready or app.state.draining:
+        raise HTTPException(status_code=503, detail="draining" if app.state.draining else "starting")
+    try:
+        await asyncio.wait_for(client.admin.command("ping"), timeout=1.0)
+    except (PyMongoError, asyncio.TimeoutError):
+        # Content routes keep working from snapshots, and contact forms spool
+        if snapshot_store is not None and len(snapshot_store) and CONTACT_WRITE_BEHIND:
+            return {"status": "ready", "database": "unavailable", "snapshots": len(snapshot_store)}
+        raise HTTPException(status_code=503, detail="database unavailable")
+    if not search_index.built:
+        # /api/search would answer [] until the first build finishes
+        raise HTTPException(status_code=503, detail="search index building")
+    return {"status": "ready"}
+
+# Metrics
+@api_router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+# Cache stats
+@api_router.get("/cache/stats")
+async def get_cache_stats():
+    return worker_stats(response_cache.stats())
+
+# Snapshot stats
+@api_router.get("/snapshots/stats")
+async def get_snapshot_stats():
+    if snapshot_store is None:
+        raise HTTPException(status_code=404, detail="Snapshot serving is disabled")
+    return worker_stats(snapshot_store.stats())
+
+# Contact write queue stats
+@api_router.get("/contact/stats")
+async def get_contact_stats():
+    return worker_stats(contact_queue.stats())
 
 # Contact Form Route
 @api_router.post("/contact", response_model=ContactForm)
@@ -155,25 +476,78 @@ async def submit_contact(form_data: ContactFormCreate):
     contact = ContactForm(**form_data.model_dump())
     
     doc = contact.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
     
-    await db.contact_forms.insert_one(doc)
+    if CONTACT_WRITE_BEHIND:
+        try:
+            await contact_queue.submit(doc)
+        except QueueFull:
+            raise HTTPException(status_code=503, detail="Too many pending submissions", headers={"Retry-After": "5"})
+    else:
+        with track_phase("db"):
+            await db.contact_forms.insert_one(doc)
     return contact
 
 # Video endpoint for hero section
-@api_router.get("/video/hero")
-async def get_hero_video():
-    video_path = ROOT_DIR / "static" / "hero-video.mp4"
-    if not video_path.exists():
-        raise HTTPException(status_code=404, detail="Video not found")
-    return FileResponse(
-        video_path,
-        media_type="video/mp4",
-        headers={
-            "Accept-Ranges": "bytes",
-            "Cache-Control": "public, max-age=31536000"
-        }
+hero_video = CachedFile(ROOT_DIR / "static" / "hero-video.mp4", "video/mp4")
+
+@api_router.api_route("/video/hero", methods=["GET", "HEAD"])
+async def get_hero_video(request: Request):
+    response = ranged_file_response(
+        request,
+        hero_video,
+        headers={"Cache-Control": "public, max-age=31536000"},
     )
+    if response is None:
+        raise HTTPException(status_code=404, detail="Video not found")
+    return response
+
+# Image proxy
+@api_router.get("/img/{kind}/{item_id}")
+async def get_image(
+    request: Request,
+    kind: str,
+    item_id: str,
+    w: Optional[int] = Query(None, ge=1, le=4096),
+    fmt: Optional[str] = Query(None, pattern="^(webp|avif|jpeg)$"),
+):
+    collection = IMAGE_KINDS.get(kind)
+    if collection is None:
+        raise HTTPException(status_code=404, detail="Unknown image kind")
+
+    key = (collection, item_id)
+    image_url = image_url_cache.get(key)
+    if image_url is None:
+        generation = image_url_cache.generation(collection)
+        with track_phase("db"):
+            doc = await db[collection].find_one({"id": item_id}, {"_id": 0, "image_url": 1})
+        image_url = (doc or {}).get("image_url") or ""
+        image_url_cache.set(key, image_url, generation)
+    if not image_url:
+        raise HTTPException(status_code=404, detail="Image not found")
+
+    output = negotiate_format(fmt, request.headers.get("accept", ""))
+    try:
+        path, body = await image_proxy.variant_bytes(kind, item_id, image_url, snap_width(w), output)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Image not found")
+    except (requests.RequestException, UnidentifiedImageError, ValueError) as exc:
+        logger.warning("Image proxy failed for %s/%s: %s", kind, item_id, exc)
+        raise HTTPException(status_code=502, detail="Could not load source image")
+
+    headers = {
+        "ETag": f'"{path.stem}"',
+        "Cache-Control": "public, max-age=604800, stale-while-revalidate=86400",
+        "Vary": "Accept",
+    }
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type=f"image/{output}", headers=headers)
+
+# Image cache stats
+@api_router.get("/img/stats")
+async def get_image_stats():
+    return worker_stats(image_proxy.cache.stats())
 
 # Include the router in the main app
 app.include_router(api_router)
@@ -184,15 +558,14 @@ app.add_middleware(
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
 
+app.add_middleware(MetricsMiddleware)
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
-
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
@@ -0,0 +1,158 @@
+"""Pre-rendered API responses on disk, for CDN origins and Mongo outages.
+
+``scripts/export_snapshots.py`` writes one JSON file (plus ``.gz``/``.br``
+variants) per route and query, and a ``manifest.json`` mapping each
+canonical request key to its file. The server serves a request from the
+snapshot when its key is in the manifest and falls back to Mongo otherwise.
+"""
+import hashlib
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Iterable, Optional, Tuple
+from urllib.parse import quote, urlencode
+
+from starlette.concurrency import run_in_threadpool
+
+from cache import ResponseCache
+from precomputed import EncodedResponse
+
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+ENCODING_SUFFIXES = {"gzip": ".gz", "br": ".br"}
+
+
+def snapshot_key(path: str, params: Iterable[Tuple[str, str]] = ()) -> str:
+    """Canonical key for a request: the path plus its query, sorted."""
+    query = urlencode(sorted(params), quote_via=quote)
+    return f"{path}?{query}" if query else path
+
+
+def _file_segment(segment: str) -> str:
+    quoted = quote(segment, safe="")
+    # An id of "." or ".." must not climb out of the snapshot directory
+    return "%2E" + quoted[1:] if quoted.startswith(".") else quoted
+
+
+def snapshot_file(key: str) -> str:
+    """Relative file name for a key, e.g. ``api/projects@category=Featured.json``."""
+    path, _, query = key.partition("?")
+    name = "/".join(_file_segment(segment) for segment in path.strip("/").split("/"))
+    if query:
+        name += "@" + quote(query, safe="=&%,")
+    return name + ".json"
+
+
+def read_manifest(directory: Path) -> dict:
+    try:
+        with open(Path(directory) / MANIFEST_NAME) as fh:
+            manifest = json.load(fh)
+    except FileNotFoundError:
+        return {"version": MANIFEST_VERSION, "entries": {}}
+    if manifest.get("version") != MANIFEST_VERSION:
+        raise ValueError(f"Unsupported snapshot manifest version {manifest.get('version')!r}")
+    return manifest
+
+
+def write_atomic(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+
+
+class SnapshotStore:
+    """Serves snapshot files listed in the manifest under ``directory``.
+
+    The manifest is re-read when its mtime changes (checked at most every
+    ``revalidate`` seconds), so a re-export is picked up without a restart.
+    Loaded responses are kept in an LRU of ``maxsize`` entries.
+    """
+
+    def __init__(self, directory: Path, revalidate: float = 5.0, maxsize: int = 1024):
+        self.directory = Path(directory)
+        self.revalidate = revalidate
+        self.generated_at = None
+        self._entries = {}
+        self._mtime = None
+        self._checked = 0.0
+        self.fallbacks = 0
+        self._cache = ResponseCache(maxsize=maxsize, ttl=float("inf"))
+
+    def _refresh(self) -> None:
+        now = time.monotonic()
+        if now - self._checked < self.revalidate:
+            return
+        self._checked = now
+        try:
+            mtime = os.stat(self.directory / MANIFEST_NAME).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if mtime == self._mtime:
+            return
+        try:
+            manifest = read_manifest(self.directory)
+        except ValueError as exc:
+            logger.warning("Ignoring snapshot manifest in %s: %s", self.directory, exc)
+            manifest = {"entries": {}}
+        self._mtime = mtime
+        self._entries = manifest["entries"]
+        self.generated_at = manifest.get("generated_at")
+        self._cache.invalidate()
+        logger.info("Loaded %d snapshots from %s", len(self._entries), self.directory)
+
+    def __len__(self) -> int:
+        self._refresh()
+        return len(self._entries)
+
+    def _load(self, entry: dict) -> Optional[EncodedResponse]:
+        path = self.directory / entry["file"]
+        try:
+            body = path.read_bytes()
+            variants = {
+                encoding: path.with_name(path.name + ENCODING_SUFFIXES[encoding]).read_bytes()
+                for encoding in entry.get("encodings", ())
+            }
+        except FileNotFoundError as exc:
+            logger.warning("Snapshot file missing: %s", exc.filename)
+            return None
+        # A re-export may be mid-way; serve from Mongo until the manifest catches up
+        if hashlib.sha256(body).hexdigest() != entry["sha256"]:
+            return None
+        return EncodedResponse.precompressed(body, variants.get("gzip"), variants.get("br"), entry.get("headers"))
+
+    async def get(self, path: str, params: Iterable[Tuple[str, str]] = ()) -> Optional[EncodedResponse]:
+        self._refresh()
+        key = snapshot_key(path, params)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.fallbacks += 1
+            return None
+        # First path segment after /api is the collection, as ResponseCache keys expect
+        cache_key = (path.split("/")[2], key)
+        encoded = self._cache.get(cache_key)
+        if encoded is None:
+            encoded = await run_in_threadpool(self._load, entry)
+            if encoded is None:
+                self.fallbacks += 1
+                return None
+            self._cache.set(cache_key, encoded)
+        return encoded
+
+    def stats(self) -> dict:
+        self._refresh()
+        cache = self._cache.stats()
+        return {
+            "directory": str(self.directory),
+            "entries": len(self._entries),
+            "generated_at": self.generated_at,
+            "loaded": cache["size"],
+            "hits": cache["hits"],
+            "loads": cache["misses"],
+            "fallbacks": self.fallbacks,
+        }
@@ -0,0 +1,213 @@
+"""Conditional and byte-range serving for large static files.
+
+The pinned starlette ``FileResponse`` ignores ``Range`` headers, so every seek
+in a ``<video>`` re-downloads the whole file. ``CachedFile`` keeps the file's
+stat, ETag and a read-only memory map between requests, and
+``ranged_file_response`` answers single and multi-range requests from slices
+of that map.
+"""
+import mmap
+import os
+import time
+import uuid
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import Response
+
+
+CHUNK_SIZE = 256 * 1024
+# More ranges than this and the whole file is cheaper to send
+MAX_RANGES = 16
+
+
+def _etag(stat: os.stat_result) -> str:
+    return '"%x-%x"' % (stat.st_mtime_ns, stat.st_size)
+
+
+class FileInfo:
+    __slots__ = ("size", "mtime", "etag", "last_modified", "map")
+
+    def __init__(self, path: Path, stat: os.stat_result):
+        self.size = stat.st_size
+        self.mtime = int(stat.st_mtime)
+        self.etag = _etag(stat)
+        self.last_modified = formatdate(stat.st_mtime, usegmt=True)
+        self.map = None
+        if self.size:
+            with open(path, "rb") as f:
+                self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class CachedFile:
+    """A file whose stat and memory map are re-checked at most every
+    ``revalidate`` seconds instead of on every request."""
+
+    def __init__(self, path: Path, media_type: str, revalidate: float = 5.0):
+        self.path = Path(path)
+        self.media_type = media_type
+        self.revalidate = revalidate
+        self._info: Optional[FileInfo] = None
+        self._checked = float("-inf")
+
+    def info(self) -> Optional[FileInfo]:
+        now = time.monotonic()
+        if now - self._checked < self.revalidate:
+            return self._info
+        self._checked = now
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            self._info = None
+            return None
+        if self._info is None or self._info.etag != _etag(stat):
+            self._info = FileInfo(self.path, stat)
+        return self._info
+
+
+def parse_ranges(header: str, size: int) -> Optional[List[Tuple[int, int]]]:
+    """Parse a ``Range`` header into sorted, coalesced inclusive (start, end)
+    pairs. Returns None when the header should be ignored and [] when no range
+    is satisfiable."""
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or not spec:
+        return None
+    ranges = []
+    for part in spec.split(","):
+        start, sep, end = part.strip().partition("-")
+        if not sep:
+            return None
+        try:
+            if not start:
+                length = int(end)
+                if length <= 0 or not size:
+                    continue
+                ranges.append((max(size - length, 0), size - 1))
+                continue
+            start = int(start)
+            end = int(end) if end else None
+        except ValueError:
+            return None
+        if end is not None and start > end:
+            return None
+        if start < size:
+            ranges.append((start, size - 1 if end is None else min(end, size - 1)))
+    if len(ranges) > MAX_RANGES:
+        return None
+
+    ranges.sort()
+    merged: List[Tuple[int, int]] = []
+    for start, end in ranges:
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _not_modified(request: Request, info: FileInfo) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or info.etag in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return info.mtime <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def _if_range_matches(request: Request, info: FileInfo) -> bool:
+    if_range = request.headers.get("if-range")
+    if if_range is None:
+        return True
+    if_range = if_range.strip()
+    if if_range.startswith('"'):
+        return if_range == info.etag
+    # Date validators must match exactly
+    return if_range == info.last_modified
+
+
+class RangedFileResponse(Response):
+    def __init__(self, info: FileInfo, status_code: int, parts: list, headers: dict, send_body: bool):
+        super().__init__(status_code=status_code, headers=headers)
+        self.info = info
+        self.parts = parts
+        self.send_body = send_body
+
+    async def __call__(self, scope, receive, send):
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if not self.send_body:
+            await send({"type": "http.response.body", "body": b""})
+            return
+        for part in self.parts:
+            if isinstance(part, bytes):
+                await send({"type": "http.response.body", "body": part, "more_body": True})
+                continue
+            start, end = part
+            for offset in range(start, end + 1, CHUNK_SIZE):
+                stop = min(offset + CHUNK_SIZE, end + 1)
+                # Slicing the map can fault pages in from disk, so keep it off the event loop
+                chunk = await run_in_threadpool(self.info.map.__getitem__, slice(offset, stop))
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+
+
+def ranged_file_response(request: Request, cached: CachedFile, headers: Optional[dict] = None) -> Optional[Response]:
+    """Serve ``cached`` honouring conditional and Range headers; None if the file is missing."""
+    info = cached.info()
+    if info is None:
+        return None
+
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": info.etag,
+        "Last-Modified": info.last_modified,
+        **(headers or {}),
+    }
+    send_body = request.method != "HEAD"
+    if _not_modified(request, info):
+        return Response(status_code=304, headers=headers)
+
+    range_header = request.headers.get("range")
+    ranges = None
+    if range_header and _if_range_matches(request, info):
+        ranges = parse_ranges(range_header, info.size)
+
+    if ranges is None:
+        headers["Content-Type"] = cached.media_type
+        headers["Content-Length"] = str(info.size)
+        parts = [(0, info.size - 1)] if info.size else []
+        return RangedFileResponse(info, 200, parts, headers, send_body)
+
+    if not ranges:
+        headers["Content-Range"] = f"bytes */{info.size}"
+        return Response(status_code=416, headers=headers)
+
+    if len(ranges) == 1:
+        start, end = ranges[0]
+        headers["Content-Type"] = cached.media_type
+        headers["Content-Range"] = f"bytes {start}-{end}/{info.size}"
+        headers["Content-Length"] = str(end - start + 1)
+        return RangedFileResponse(info, 206, ranges, headers, send_body)
+
+    boundary = uuid.uuid4().hex
+    parts, length = [], 0
+    for start, end in ranges:
+        preamble = (
+            f"--{boundary}\r\nContent-Type: {cached.media_type}\r\n"
+            f"Content-Range: bytes {start}-{end}/{info.size}\r\n\r\n"
+        ).encode()
+        parts += [preamble, (start, end), b"\r\n"]
+        length += len(preamble) + end - start + 1 + 2
+    closing = f"--{boundary}--\r\n".encode()
+    parts.append(closing)
+    length += len(closing)
+    headers["Content-Type"] = f"multipart/byteranges; boundary={boundary}"
+    headers["Content-Length"] = str(length)
+    return RangedFileResponse(info, 206, parts, headers, send_body)
@@ -0,0 +1,375 @@
+import asyncio
+import fcntl
+import itertools
+import logging
+import os
+from collections import deque
+from pathlib import Path
+from typing import Iterator, Optional
+
+from bson import json_util
+from pymongo.errors import BulkWriteError, PyMongoError
+
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY = 11000
+# Flushed documents are only cut out of the spool once they take this much of it
+COMPACT_MIN_BYTES = 4 * 1024 * 1024
+
+
+class QueueFull(Exception):
+    pass
+
+
+class WriteBehindQueue:
+    """Acknowledge inserts immediately and flush them to ``collection`` in
+    ``insert_many`` batches.
+
+    Pending documents are appended to an Extended JSON-lines spool file before being
+    acknowledged and replayed on start, so accepted writes survive a restart.
+    Documents are flushed in submission order; a failed batch is retried from
+    its first unwritten document. Replays rely on a unique index on ``id`` to
+    stay idempotent.
+
+    Flushing only advances a byte offset (kept in ``<spool>.offset``); the
+    spool is truncated when the queue empties and compacted off the event
+    loop once flushed lines dominate it. Documents the server rejects for
+    good (anything but a duplicate key) go to ``<spool>.rejected`` instead of
+    blocking the queue.
+
+    A process owns its spool through an exclusive lock on ``<spool>.lock``.
+    ``slot`` names the preferred spool (``<stem>.<slot><suffix>``, one per
+    run.py worker); if another process holds it, the first free numbered
+    slot is used instead. On start, spools of the same family that nobody
+    holds (a crashed process, or a slot run.py no longer starts) are
+    adopted: their pending lines are appended to this spool and removed.
+    """
+
+    def __init__(
+        self,
+        collection,
+        spool_path: Path,
+        slot: Optional[str] = None,
+        batch_size: int = 100,
+        flush_interval: float = 0.5,
+        max_pending: int = 10000,
+        max_backoff: float = 30.0,
+    ):
+        self.collection = collection
+        self.base_path = Path(spool_path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.max_backoff = max_backoff
+        self.flushed = 0
+        self.failures = 0
+        self.rejected = 0
+        self.adopted = 0
+        self._use_spool(self._slot_path(slot) if slot is not None else self.base_path)
+        self._pending: deque = deque()
+        self._sizes: deque = deque()
+        self._offset = 0
+        self._compaction: Optional[asyncio.Task] = None
+        self._wake = asyncio.Event()
+        self._space = asyncio.Event()
+        self._space.set()
+        self._spool = None
+        self._lock = None
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+
+    def _slot_path(self, slot) -> Path:
+        return self.base_path.with_name(f"{self.base_path.stem}.{slot}{self.base_path.suffix}")
+
+    def _use_spool(self, path: Path) -> None:
+        self.spool_path = path
+        self.offset_path = path.with_name(path.name + ".offset")
+        self.rejected_path = path.with_name(path.name + ".rejected")
+
+    def _family(self) -> Iterator[Path]:
+        """Every spool path a queue on ``base_path`` may have used."""
+        yield self.base_path
+        yield from sorted(self.base_path.parent.glob(f"{self.base_path.stem}.*{self.base_path.suffix}"))
+
+    @staticmethod
+    def _try_lock(path: Path):
+        # The lock file is never removed; unlinking it would let two processes
+        # lock different inodes under the same name
+        lock = open(path.with_name(path.name + ".lock"), "a")
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock.close()
+            return None
+        return lock
+
+    def _claim_spool(self) -> None:
+        preferred = self.spool_path
+        for path in itertools.chain([preferred], (self._slot_path(n) for n in itertools.count(1))):
+            self._lock = self._try_lock(path)
+            if self._lock is not None:
+                break
+        if path != preferred:
+            logger.warning("%s is locked by another process, spooling to %s", preferred, path)
+        self._use_spool(path)
+
+    def _adopt_orphans(self) -> None:
+        for path in self._family():
+            if path == self.spool_path or not path.exists():
+                continue
+            lock = self._try_lock(path)
+            if lock is None:
+                # Its owner is alive
+                continue
+            try:
+                offset = self._offset_of(path, path.with_name(path.name + ".offset"))
+                adopted = 0
+                with open(path, "rb") as orphan:
+                    orphan.seek(offset)
+                    for line in orphan:
+                        try:
+                            doc = json_util.loads(line)
+                        except ValueError:
+                            # Torn final line, never acknowledged
+                            continue
+                        line = line if line.endswith(b"\n") else line + b"\n"
+                        self._spool.write(line)
+                        self._pending.append(doc)
+                        self._sizes.append(len(line))
+                        adopted += 1
+                # Durable here before the orphan goes; a crash in between only
+                # replays duplicates, which the unique id index skips
+                self._spool.flush()
+                os.fsync(self._spool.fileno())
+                path.unlink()
+                path.with_name(path.name + ".offset").unlink(missing_ok=True)
+            finally:
+                lock.close()
+            if adopted:
+                self.adopted += adopted
+                logger.info("Adopted %d %s documents from orphaned spool %s", adopted, self.collection.name, path)
+
+    async def start(self) -> None:
+        self.spool_path.parent.mkdir(parents=True, exist_ok=True)
+        self._claim_spool()
+        if self.spool_path.exists():
+            self._offset = self._read_offset()
+            with open(self.spool_path, "rb") as spool:
+                spool.seek(self._offset)
+                for line in spool:
+                    try:
+                        self._pending.append(json_util.loads(line))
+                        self._sizes.append(len(line))
+                    except ValueError:
+                        # Torn final line from a crash mid-append; it was never acknowledged
+                        logger.warning("Skipping unreadable line in %s", self.spool_path)
+                        # Its bytes are skipped along with the line before it
+                        if self._sizes:
+                            self._sizes[-1] += len(line)
+                        else:
+                            self._offset += len(line)
+            if self._pending:
+                logger.info("Replaying %d spooled %s documents", len(self._pending), self.collection.name)
+        self._spool = open(self.spool_path, "ab")
+        if self._spool_size() and not self._ends_with_newline():
+            # Terminate a torn line so the next append starts on its own line
+            self._spool.write(b"\n")
+            self._spool.flush()
+            if self._sizes:
+                self._sizes[-1] += 1
+            else:
+                self._offset += 1
+        self._adopt_orphans()
+        self._task = asyncio.create_task(self._run())
+
+    async def submit(self, doc: dict, timeout: float = 1.0) -> None:
+        if self._closed:
+            raise QueueFull("write queue is shutting down")
+        while len(self._pending) >= self.max_pending:
+            self._space.clear()
+            self._wake.set()
+            try:
+                await asyncio.wait_for(self._space.wait(), timeout)
+            except asyncio.TimeoutError:
+                raise QueueFull(f"{len(self._pending)} writes pending")
+        line = (json_util.dumps(doc) + "\n").encode()
+        self._spool.write(line)
+        self._spool.flush()
+        self._pending.append(doc)
+        self._sizes.append(len(line))
+        if len(self._pending) >= self.batch_size:
+            self._wake.set()
+
+    async def drain(self, timeout: float = 10.0) -> None:
+        """Stop accepting writes and flush what is pending. Anything that cannot
+        be written before ``timeout`` stays in the spool for the next start."""
+        self._closed = True
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self._compaction is not None:
+            await self._compaction
+        try:
+            await asyncio.wait_for(self._flush_all(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Left %d %s documents in %s", len(self._pending), self.collection.name, self.spool_path)
+        if self._spool is not None:
+            self._spool.close()
+        if self._lock is not None:
+            self._lock.close()
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._pending),
+            "max_pending": self.max_pending,
+            "flushed": self.flushed,
+            "failures": self.failures,
+            "rejected": self.rejected,
+            "adopted": self.adopted,
+            "spool": str(self.spool_path),
+        }
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            if self._closed:
+                # wait_for can swallow drain()'s cancel when the wake-up races
+                # it (before Python 3.12); drain() does the final flush
+                return
+            self._wake.clear()
+            await self._flush_all()
+
+    async def _flush_all(self) -> None:
+        backoff = 0.1
+        while self._pending:
+            if await self._flush_batch():
+                backoff = 0.1
+            else:
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
+
+    async def _flush_batch(self) -> bool:
+        batch = [self._pending[i] for i in range(min(self.batch_size, len(self._pending)))]
+        written, rejected, ok = len(batch), None, True
+        try:
+            # Copies, so the spooled dicts never pick up an ObjectId _id
+            await self.collection.insert_many([dict(doc) for doc in batch], ordered=True)
+        except BulkWriteError as exc:
+            errors = exc.details.get("writeErrors") or []
+            if not errors:
+                # Write concern trouble only; retry, duplicates are skipped next time
+                written, ok = 0, False
+                logger.warning("Insert into %s not acknowledged: %s", self.collection.name, exc.details.get("writeConcernErrors"))
+            else:
+                error = errors[0]
+                # Everything before the failing index was written; a duplicate id
+                # means this document was written before a previous retry
+                written = error["index"]
+                if error["code"] == DUPLICATE_KEY:
+                    written += 1
+                else:
+                    # The server rejected the document itself; retrying can't help
+                    rejected = error
+        except PyMongoError as exc:
+            written, ok = 0, False
+            logger.warning("Insert into %s failed: %s", self.collection.name, exc)
+
+        if not ok:
+            self.failures += 1
+        done = written + (rejected is not None)
+        if rejected is not None:
+            self._dead_letter(self._pending[written], rejected)
+        if done:
+            for _ in range(done):
+                self._pending.popleft()
+                self._offset += self._sizes.popleft()
+            self.flushed += written
+            await self._advance_spool()
+            self._space.set()
+        return ok
+
+    def _dead_letter(self, doc: dict, error: dict) -> None:
+        self.rejected += 1
+        logger.error("Insert into %s rejected %s: %s; moved to %s",
+                     self.collection.name, doc.get("id"), error.get("errmsg"), self.rejected_path)
+        with open(self.rejected_path, "a") as rejected:
+            rejected.write(json_util.dumps({"doc": doc, "code": error.get("code"), "errmsg": error.get("errmsg")}) + "\n")
+
+    def _spool_size(self) -> int:
+        return os.fstat(self._spool.fileno()).st_size
+
+    def _ends_with_newline(self) -> bool:
+        with open(self.spool_path, "rb") as spool:
+            spool.seek(-1, os.SEEK_END)
+            return spool.read(1) == b"\n"
+
+    def _read_offset(self) -> int:
+        return self._offset_of(self.spool_path, self.offset_path)
+
+    @staticmethod
+    def _offset_of(spool_path: Path, offset_path: Path) -> int:
+        try:
+            offset = int(offset_path.read_text())
+            with open(spool_path, "rb") as spool:
+                # Must point just past a line, or the spool changed underneath it
+                if offset > 0 and (spool.seek(offset - 1) != offset - 1 or spool.read(1) != b"\n"):
+                    raise ValueError(offset)
+        except (FileNotFoundError, ValueError):
+            # Replaying from the start is safe, only slower
+            return 0
+        return offset
+
+    def _write_offset(self, offset: int) -> None:
+        tmp_path = self.offset_path.with_name(self.offset_path.name + ".tmp")
+        tmp_path.write_text(str(offset))
+        os.replace(tmp_path, self.offset_path)
+
+    async def _advance_spool(self) -> None:
+        if not self._pending:
+            # Nothing left to replay: start the spool over, which is O(1)
+            self._write_offset(0)
+            self._spool.truncate(0)
+            self._offset = 0
+        elif self._offset >= COMPACT_MIN_BYTES and self._offset * 2 >= self._spool_size():
+            # Shielded so a drain that cancels the flusher waits for it instead
+            self._compaction = asyncio.ensure_future(self._compact())
+            await asyncio.shield(self._compaction)
+        else:
+            self._write_offset(self._offset)
+
+    async def _compact(self) -> None:
+        start, end = self._offset, self._spool_size()
+        tmp_path = self.spool_path.with_name(self.spool_path.name + ".tmp")
+        # Copy the unflushed part in a thread; submit() keeps appending meanwhile
+        await asyncio.to_thread(_copy_range, self.spool_path, tmp_path, start, end)
+        with open(self.spool_path, "rb") as spool, open(tmp_path, "ab") as tmp:
+            spool.seek(end)
+            tmp.write(spool.read())
+        # A crash between these two steps replays from the start, which is safe
+        self._write_offset(0)
+        self._spool.close()
+        os.replace(tmp_path, self.spool_path)
+        self._spool = open(self.spool_path, "ab")
+        self._offset -= start
+        self._compaction = None
+
+
+def _copy_range(source: Path, target: Path, start: int, end: int) -> None:
+    with open(source, "rb") as src, open(target, "wb") as dst:
+        src.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            chunk = src.read(min(remaining, 1024 * 1024))
+            if not chunk:
+                break
+            dst.write(chunk)
+            remaining -= len(chunk)
+        dst.flush()
+        os.fsync(dst.fileno())
@@ -24,7 +24,7 @@ const Portfolio = () => {
 
   const fetchProjects = async () => {
     try {
-      const response = await axios.get(`${API}/projects`);
+      const response = await axios.get(`${API}/projects?fields=id,name,address,category,units,year,image_url`);
       setProjects(response.data);
     } catch (error) {
       console.error('Error fetching projects:', error);
@@ -149,7 +149,7 @@ const Portfolio = () => {
                   <Link to={`/portfolio/${project.id}`}>
                     <div className="aspect-[4/3] overflow-hidden bg-gray-100 relative">
                       <img
-                        src={project.image_url || 'https://images.unsplash.com/photo-1645510807290-cc82de2749f2?crop=entropy&cs=srgb&fm=jpg&q=85'}
+                        src={project.image_url ? `${API}/img/project/${project.id}?w=640` : 'https://images.unsplash.com/photo-1645510807290-cc82de2749f2?crop=entropy&cs=srgb&fm=jpg&q=85'}
                         alt={project.name}
                         className="w-full h-full object-cover group-hover:scale-110 transition-transform duration-700"
                       />
@@ -0,0 +1,272 @@
+"""Load-test and regression benchmark for every route in backend/server.py.
+
+Boots the app in-process against an ephemeral local mongod (default), an
+existing MONGO_URL (--mongo-url), or an in-memory mongomock-motor fake
+(--fake). Seeds it with scripts/seed_db.py at the requested scale, then drives
+each scenario with concurrent async clients over httpx's ASGI transport and
+reports req/s, p50/p95/p99 latency and RSS. RSS is the benchmark process,
+client included; httpx's ASGI transport buffers whole bodies, so the video
+scenarios inflate it by roughly concurrency x body size.
+
+The response cache is off unless --cached is given, so the content scenarios
+time the Mongo query, projection and serialization path rather than cache
+hits. The image scenario serves a synthetic fixture through the proxy and its
+disk cache.
+
+    python scripts/bench_api.py --projects 10000 --news 2000 --save-baseline scripts/bench_baseline.json
+    python scripts/bench_api.py --projects 10000 --news 2000 --compare scripts/bench_baseline.json --threshold 0.15
+
+With --compare the run exits non-zero if any scenario's req/s drops by more
+than --threshold, or its p99 rises by more than --p99-threshold (default: the
+same), relative to the baseline. Baselines from another machine are only
+indicative; tests/test_bench_regression.py measures the merge-base and the
+working tree back to back with --fake instead.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import resource
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+import httpx
+from PIL import Image
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+BACKEND_DIR = SCRIPTS_DIR.parent / 'backend'
+
+CONTACT_FORM = {
+    "name": "Bench Mark",
+    "email": "bench@example.com",
+    "interest": "Investor",
+    "message": "Benchmark submission.",
+}
+
+# name -> (method, path, headers, json body)
+SCENARIOS = {
+    "projects_list": ("GET", "/api/projects", {}, None),
+    "projects_page": ("GET", "/api/projects?limit=50&fields=id,name,address,category,units,year,image_url", {}, None),
+    "projects_category": ("GET", "/api/projects?category=Featured", {}, None),
+    "project_detail": ("GET", "/api/projects/628-summit", {}, None),
+    "team_list": ("GET", "/api/team", {}, None),
+    "news_list": ("GET", "/api/news", {}, None),
+    "news_summary": ("GET", "/api/news?fields=id,title,date,short_content,image_url", {}, None),
+    "news_detail": ("GET", "/api/news/singh-tower-completion", {}, None),
+    "contact_post": ("POST", "/api/contact", {}, CONTACT_FORM),
+    "video_full": ("GET", "/api/video/hero", {}, None),
+    "video_range": ("GET", "/api/video/hero", {"Range": "bytes=1048576-2097151"}, None),
+    "video_multirange": ("GET", "/api/video/hero", {"Range": "bytes=0-1023,4194304-4198399"}, None),
+    "search": ("GET", "/api/search?q=summit", {}, None),
+    "search_prefix": ("GET", "/api/search?q=tow&kind=project", {}, None),
+    "image_variant": ("GET", "/api/img/project/628-summit?w=320&fmt=jpeg", {}, None),
+}
+
+
+def current_rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        # Peak rather than current RSS; ru_maxrss is KiB on Linux, bytes on macOS
+        scale = 2**20 if sys.platform == "darwin" else 2**10
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@asynccontextmanager
+async def ephemeral_mongod():
+    mongod = shutil.which("mongod")
+    if mongod is None:
+        sys.exit("mongod not found on PATH; use --mongo-url or --fake")
+    dbpath = tempfile.mkdtemp(prefix="bench-mongod-")
+    port = free_port()
+    process = subprocess.Popen(
+        [mongod, "--dbpath", dbpath, "--port", str(port), "--bind_ip", "127.0.0.1", "--quiet"],
+        stdout=subprocess.DEVNULL,
+    )
+    try:
+        for _ in range(100):
+            try:
+                with socket.create_connection(("127.0.0.1", port), timeout=0.1):
+                    break
+            except OSError:
+                await asyncio.sleep(0.1)
+        yield f"mongodb://127.0.0.1:{port}"
+    finally:
+        process.terminate()
+        process.wait()
+        shutil.rmtree(dbpath, ignore_errors=True)
+
+
+async def measure(client: httpx.AsyncClient, scenario, total: int, concurrency: int) -> dict:
+    method, path, headers, body = scenario
+    latencies = []
+    remaining = iter(range(total))
+
+    async def worker():
+        for _ in remaining:
+            start = time.perf_counter()
+            response = await client.request(method, path, headers=headers, json=body)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                raise RuntimeError(f"{method} {path}: {response.status_code} {response.text[:200]}")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+    return {
+        "req_s": round(total / elapsed, 1),
+        "p50_ms": round(percentile(0.50), 3),
+        "p95_ms": round(percentile(0.95), 3),
+        "p99_ms": round(percentile(0.99), 3),
+        "rss_mb": round(current_rss_mb(), 1),
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float, p99_threshold: float) -> list:
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get("scenarios", {}).get(name)
+        if base is None:
+            continue
+        if result["req_s"] < base["req_s"] * (1 - threshold):
+            regressions.append(f"{name}: req/s {result['req_s']} < baseline {base['req_s']}")
+        if result["p99_ms"] > base["p99_ms"] * (1 + p99_threshold):
+            regressions.append(f"{name}: p99 {result['p99_ms']}ms > baseline {base['p99_ms']}ms")
+    return regressions
+
+
+async def run(args, mongo_url: str) -> dict:
+    os.environ["MONGO_URL"] = mongo_url
+    os.environ.setdefault("DB_NAME", "bench")
+    spool_dir = tempfile.mkdtemp(prefix="bench-spool-")
+    os.environ["CONTACT_SPOOL_PATH"] = str(Path(spool_dir) / "contact_forms.jsonl")
+    if not args.cached:
+        os.environ["RESPONSE_CACHE_SIZE"] = "0"
+    # Image sources come from a fixture directory instead of the network
+    image_dir = Path(spool_dir) / "images"
+    (image_dir / "project").mkdir(parents=True)
+    Image.new("RGB", (1600, 1200), (90, 120, 150)).save(image_dir / "project" / "628-summit.jpg", quality=85)
+    os.environ["IMAGE_SOURCE_DIR"] = str(image_dir)
+    os.environ["IMAGE_CACHE_DIR"] = str(Path(spool_dir) / "image_cache")
+    sys.path[:0] = [str(BACKEND_DIR), str(SCRIPTS_DIR)]
+
+    import seed_db
+    import server
+    from static_files import CachedFile
+
+    if args.fake:
+        from mongomock_motor import AsyncMongoMockClient
+
+        fake = AsyncMongoMockClient()
+        fake.close = lambda: None
+        seed_db.AsyncIOMotorClient = lambda *a, **kw: fake
+        server.create_client = lambda: fake
+
+    await seed_db.seed_database()
+    if args.projects or args.news:
+        await seed_db.seed_synthetic(args.projects, args.news, args.chunk_size, 4, False, 0)
+
+    # A synthetic hero video, so the range scenarios don't depend on a checked-in asset
+    video_path = Path(spool_dir) / "hero-video.mp4"
+    with open(video_path, "wb") as video:
+        video.write(os.urandom(args.video_mb * 2**20))
+    server.hero_video = CachedFile(video_path, "video/mp4")
+
+    results = {}
+    try:
+        transport = httpx.ASGITransport(app=server.app)
+        limits = httpx.Limits(max_connections=args.concurrency)
+        async with server.lifespan(server.app), httpx.AsyncClient(transport=transport, base_url="http://bench", limits=limits) as client:
+            while not server.search_index.built:
+                await asyncio.sleep(0.05)
+            for name, scenario in SCENARIOS.items():
+                if args.only and name not in args.only:
+                    continue
+                # Warm connections, the image cache and lazy imports
+                await measure(client, scenario, min(args.requests, 50), 1)
+                results[name] = await measure(client, scenario, args.requests, args.concurrency)
+                r = results[name]
+                print(f"{name:<20} {r['req_s']:>10.1f} {r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f} {r['rss_mb']:>9.1f}")
+    finally:
+        shutil.rmtree(spool_dir, ignore_errors=True)
+    return results
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    backend = parser.add_mutually_exclusive_group()
+    backend.add_argument('--mongo-url', help="use an existing Mongo instead of starting mongod")
+    backend.add_argument('--fake', action='store_true', help="use an in-memory mongomock-motor database")
+    parser.add_argument('--projects', type=int, default=0, help="synthetic projects to seed")
+    parser.add_argument('--news', type=int, default=0, help="synthetic news articles to seed")
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    parser.add_argument('--video-mb', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=1000, help="requests per scenario")
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--cached', action='store_true', help="keep the response cache on (times cache hits)")
+    parser.add_argument('--only', nargs='+', choices=sorted(SCENARIOS), help="run only these scenarios")
+    parser.add_argument('--save-baseline', type=Path)
+    parser.add_argument('--compare', type=Path)
+    parser.add_argument('--threshold', type=float, default=0.2)
+    parser.add_argument('--p99-threshold', type=float, help="tail latencies are noisier; defaults to --threshold")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger('httpx').setLevel(logging.WARNING)
+
+    print(f"{'scenario':<20} {'req/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'rss MB':>9}")
+    if args.fake:
+        results = await run(args, "mongodb://fake")
+    elif args.mongo_url:
+        results = await run(args, args.mongo_url)
+    else:
+        async with ephemeral_mongod() as mongo_url:
+            results = await run(args, mongo_url)
+
+    report = {
+        "config": {
+            "projects": args.projects,
+            "news": args.news,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "video_mb": args.video_mb,
+            "cached": args.cached,
+            "backend": "fake" if args.fake else "mongod",
+        },
+        "scenarios": results,
+    }
+    if args.save_baseline:
+        args.save_baseline.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"✅ Baseline written to {args.save_baseline}")
+    if args.compare:
+        p99_threshold = args.threshold if args.p99_threshold is None else args.p99_threshold
+        regressions = compare(results, json.loads(args.compare.read_text()), args.threshold, p99_threshold)
+        for regression in regressions:
+            print(f"❌ {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"✅ No scenario regressed by more than {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
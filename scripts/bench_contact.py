@@ -0,0 +1,97 @@
+"""Load test for POST /api/contact, direct insert_one vs. the write-behind queue.
+
+Each mode runs the real app in a fresh subprocess against MONGO_URL/DB_NAME
+(use a scratch database; submissions are inserted into contact_forms):
+
+    MONGO_URL=mongodb://localhost:27017 DB_NAME=bench python scripts/bench_contact.py --requests 5000
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / 'backend'
+
+FORM = {
+    "name": "Load Test",
+    "email": "load.test@example.com",
+    "phone": "201-555-0100",
+    "company": "GN Management",
+    "interest": "Investor",
+    "message": "Interested in upcoming Jersey City developments.",
+}
+
+
+async def run_mode(total: int, concurrency: int) -> dict:
+    import httpx
+
+    sys.path.insert(0, str(BACKEND_DIR))
+    import server
+
+    logging.getLogger('httpx').setLevel(logging.WARNING)
+    lifespan = server.lifespan(server.app)
+    await lifespan.__aenter__()
+    latencies = []
+    remaining = iter(range(total))
+    transport = httpx.ASGITransport(app=server.app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            async def worker():
+                for _ in remaining:
+                    start = time.perf_counter()
+                    response = await client.post("/api/contact", json=FORM)
+                    latencies.append(time.perf_counter() - start)
+                    assert response.status_code == 200, response.text
+
+            start = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            elapsed = time.perf_counter() - start
+    finally:
+        drain_start = time.perf_counter()
+        await lifespan.__aexit__(None, None, None)
+        drain = time.perf_counter() - drain_start
+
+    latencies.sort()
+    return {
+        "req_s": total / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+        "drain_s": drain,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--mode', choices=['direct', 'queued'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(asyncio.run(run_mode(args.requests, args.concurrency))))
+        return
+
+    print(f"{'mode':<10} {'req/s':>10} {'p50 ms':>10} {'p99 ms':>10} {'drain s':>10}")
+    with tempfile.TemporaryDirectory() as spool_dir:
+        for mode in ('direct', 'queued'):
+            env = dict(
+                os.environ,
+                CONTACT_WRITE_BEHIND='true' if mode == 'queued' else 'false',
+                CONTACT_SPOOL_PATH=str(Path(spool_dir) / 'contact_forms.jsonl'),
+            )
+            output = subprocess.run(
+                [sys.executable, __file__, '--mode', mode, '--requests', str(args.requests), '--concurrency', str(args.concurrency)],
+                env=env, check=True, capture_output=True, text=True,
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(f"{mode:<10} {result['req_s']:>10.1f} {result['p50_ms']:>10.2f} {result['p99_ms']:>10.2f} {result['drain_s']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Compare the response_model serialization path with pre-encoded bodies.
+
+Runs both variants in-process over httpx's ASGI transport (no network, no
+Mongo) and reports req/s and p50/p99 latency per scenario:
+
+    python scripts/bench_responses.py --articles 100 --requests 2000 --concurrency 32
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+import httpx
+from fastapi import FastAPI, Request
+from pydantic import TypeAdapter
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'backend'))
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+os.environ.setdefault('DB_NAME', 'bench')
+
+from server import NewsArticle  # noqa: E402
+from precomputed import EncodedResponse, encoded_response  # noqa: E402
+
+
+def make_news(count: int) -> List[dict]:
+    paragraph = (
+        "GN Management continues its commitment to Jersey City with new "
+        "residential developments, community partnerships and workforce housing. "
+    )
+    return [
+        {
+            "id": f"article-{i}",
+            "title": f"GN Management announces development #{i}",
+            "date": f"2025-{(i % 12) + 1:02d}-{(i % 28) + 1:02d}",
+            "content": paragraph * 40,
+            "short_content": paragraph,
+            "image_url": "https://images.unsplash.com/photo-1559690869-1005b5a5ee41",
+        }
+        for i in range(count)
+    ]
+
+
+def build_apps(news: List[dict]):
+    baseline = FastAPI()
+
+    @baseline.get("/api/news", response_model=List[NewsArticle])
+    async def baseline_news():
+        return [dict(article) for article in news]
+
+    precomputed = FastAPI()
+    encoded = EncodedResponse.from_data(TypeAdapter(List[NewsArticle]), [NewsArticle(**article) for article in news])
+
+    @precomputed.get("/api/news", response_model=List[NewsArticle])
+    async def precomputed_news(request: Request):
+        return encoded_response(request, encoded)
+
+    return baseline, precomputed, encoded.etag
+
+
+async def run(app, total: int, concurrency: int, headers: dict) -> dict:
+    latencies = []
+    remaining = iter(range(total))
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def worker():
+            for _ in remaining:
+                start = time.perf_counter()
+                response = await client.get("/api/news", headers=headers)
+                latencies.append(time.perf_counter() - start)
+                assert response.status_code in (200, 304), response.status_code
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "req_s": total / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--articles', type=int, default=100)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=32)
+    args = parser.parse_args()
+    logging.getLogger('httpx').setLevel(logging.WARNING)
+
+    baseline, precomputed, etag = build_apps(make_news(args.articles))
+    scenarios = [
+        ("response_model", baseline, {}),
+        ("precomputed", precomputed, {}),
+        ("precomputed gzip", precomputed, {"Accept-Encoding": "gzip"}),
+        ("precomputed 304", precomputed, {"If-None-Match": etag}),
+    ]
+    print(f"{'scenario':<20} {'req/s':>10} {'p50 ms':>10} {'p99 ms':>10}")
+    for name, app, headers in scenarios:
+        result = await run(app, args.requests, args.concurrency, headers)
+        print(f"{name:<20} {result['req_s']:>10.1f} {result['p50_ms']:>10.2f} {result['p99_ms']:>10.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,213 @@
+"""Render the read-only API to static, precompressed JSON snapshots.
+
+Every list route (each category, each field set the frontend asks for, each
+page) and every project/article detail is written as ``<file>.json`` plus
+``.gz``/``.br`` variants, with ``manifest.json`` recording each request key,
+file, content hash and the hash of the source documents it was built from.
+Re-running only re-renders outputs whose source documents changed and removes
+outputs whose documents are gone. Serve the result with ``SNAPSHOT_DIR`` set
+on the API, or from a CDN origin:
+
+    python scripts/export_snapshots.py --out backend/snapshots
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import bson
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / 'backend'))
+
+from motor.motor_asyncio import AsyncIOMotorClient  # noqa: E402
+from pagination import encode_cursor, parse_fields  # noqa: E402
+from precomputed import EncodedResponse  # noqa: E402
+from server import (  # noqa: E402
+    NewsArticle, Project, TeamMember, document_adapter, encode_page, response_document, response_fields,
+)
+from snapshots import (  # noqa: E402
+    ENCODING_SUFFIXES, MANIFEST_NAME, MANIFEST_VERSION, read_manifest, snapshot_file, snapshot_key, write_atomic,
+)
+
+mongo_url = os.environ['MONGO_URL']
+db_name = os.environ['DB_NAME']
+
+# Default page sizes of the list routes
+PROJECTS_LIMIT = 1000
+NEWS_LIMIT = 100
+TEAM_LIMIT = 100
+
+# fields= variants requested by the frontend (Portfolio.jsx, News.jsx)
+FIELD_VARIANTS = {
+    "projects": [None, "id,name,address,category,units,year,image_url"],
+    "news": [None, "id,title,date,short_content,image_url"],
+}
+
+
+class Output:
+    __slots__ = ("key", "sources", "render")
+
+    def __init__(self, key, model, docs, hashes, render, extra=""):
+        self.key = key
+        # Bumps whenever the inputs or the model's response fields change
+        digest = hashlib.sha256(f"{key}\0{response_fields[model]}\0{extra}".encode())
+        for doc in docs:
+            digest.update(hashes[doc["_id"]].encode())
+        self.sources = digest.hexdigest()
+        self.render = render
+
+
+def list_outputs(path, params, docs, hashes, model, fields, limit, cursor_values):
+    """One output per page of a list route, following X-Next-Cursor."""
+    selected = parse_fields(fields, model)
+    if fields:
+        params = params + [("fields", fields)]
+    cursor = None
+    for start in range(0, max(len(docs), 1), limit):
+        page = docs[start:start + limit]
+        next_cursor = encode_cursor(cursor_values(page[-1])) if len(docs) > start + limit else None
+        key = snapshot_key(path, params + ([("cursor", cursor)] if cursor else []))
+        yield Output(key, model, page, hashes,
+                     lambda page=page, next_cursor=next_cursor: encode_page([dict(doc) for doc in page], model, selected, next_cursor),
+                     extra=next_cursor or "")
+        cursor = next_cursor
+
+
+def detail_outputs(path, docs, hashes, model):
+    for doc in docs:
+        if doc.get("id") is None:
+            continue
+        yield Output(f"{path}/{doc['id']}", model, [doc], hashes,
+                     lambda doc=doc: EncodedResponse.from_data(document_adapter, response_document(dict(doc), model)))
+
+
+async def load_collection(db, name):
+    docs = await db[name].find({}).sort("_id", 1).to_list(None)
+    hashes = {doc["_id"]: hashlib.sha256(bson.encode(doc)).hexdigest() for doc in docs}
+    return docs, hashes
+
+
+async def collect_outputs(db):
+    projects, project_hashes = await load_collection(db, "projects")
+    team, team_hashes = await load_collection(db, "team")
+    news, news_hashes = await load_collection(db, "news")
+    # Same order as the news route: newest date first, then id
+    news.sort(key=lambda doc: doc.get("id") or "")
+    news.sort(key=lambda doc: doc.get("date") or "", reverse=True)
+
+    outputs = []
+    categories = sorted({doc["category"] for doc in projects if doc.get("category")})
+    for fields in FIELD_VARIANTS["projects"]:
+        outputs += list_outputs("/api/projects", [], projects, project_hashes, Project, fields, PROJECTS_LIMIT,
+                                lambda doc: [str(doc["_id"])])
+        for category in categories:
+            in_category = [doc for doc in projects if doc.get("category") == category]
+            outputs += list_outputs("/api/projects", [("category", category)], in_category, project_hashes, Project,
+                                    fields, PROJECTS_LIMIT, lambda doc: [str(doc["_id"])])
+    outputs += detail_outputs("/api/projects", projects, project_hashes, Project)
+
+    outputs.append(Output("/api/team", TeamMember, team[:TEAM_LIMIT], team_hashes,
+                          lambda: encode_page([dict(doc) for doc in team[:TEAM_LIMIT]], TeamMember, None, None)))
+
+    for fields in FIELD_VARIANTS["news"]:
+        outputs += list_outputs("/api/news", [], news, news_hashes, NewsArticle, fields, NEWS_LIMIT,
+                                lambda doc: [doc["date"], doc["id"]])
+    outputs += detail_outputs("/api/news", news, news_hashes, NewsArticle)
+    return outputs
+
+
+def write_output(out_dir: Path, key: str, encoded: EncodedResponse) -> dict:
+    file = snapshot_file(key)
+    path = out_dir / file
+    write_atomic(path, encoded.body)
+    encodings = []
+    for encoding, suffix in ENCODING_SUFFIXES.items():
+        variant_path = path.with_name(path.name + suffix)
+        data = getattr(encoded, encoding)
+        if data is None:
+            variant_path.unlink(missing_ok=True)
+            continue
+        write_atomic(variant_path, data)
+        encodings.append(encoding)
+    return {
+        "file": file,
+        "sha256": hashlib.sha256(encoded.body).hexdigest(),
+        "etag": encoded.etag,
+        "size": len(encoded.body),
+        "encodings": encodings,
+        "headers": encoded.headers,
+    }
+
+
+def remove_output(out_dir: Path, entry: dict) -> None:
+    path = out_dir / entry["file"]
+    for suffix in ("", *ENCODING_SUFFIXES.values()):
+        path.with_name(path.name + suffix).unlink(missing_ok=True)
+
+
+def is_current(out_dir: Path, entry: dict) -> bool:
+    path = out_dir / entry["file"]
+    return path.exists() and all(
+        path.with_name(path.name + ENCODING_SUFFIXES[encoding]).exists() for encoding in entry.get("encodings", ())
+    )
+
+
+async def export(out_dir: Path, force: bool):
+    client = AsyncIOMotorClient(mongo_url, tz_aware=True)
+    db = client[db_name]
+    start = time.perf_counter()
+
+    previous = read_manifest(out_dir)["entries"]
+    outputs = await collect_outputs(db)
+    client.close()
+
+    entries = {}
+    written = unchanged = 0
+    for output in outputs:
+        old = None if force else previous.get(output.key)
+        if old is not None and old.get("sources") == output.sources and is_current(out_dir, old):
+            entries[output.key] = old
+            unchanged += 1
+            continue
+        encoded = output.render()
+        if old is not None and old["sha256"] == hashlib.sha256(encoded.body).hexdigest() and is_current(out_dir, old):
+            # Sources changed in fields this output doesn't render
+            entries[output.key] = dict(old, sources=output.sources)
+            unchanged += 1
+            continue
+        entries[output.key] = dict(write_output(out_dir, output.key, encoded), sources=output.sources)
+        written += 1
+
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "entries": entries,
+    }
+    # The manifest goes last, so the server never points at files not yet written
+    write_atomic(out_dir / MANIFEST_NAME, json.dumps(manifest, indent=1, sort_keys=True).encode())
+
+    removed = [entry for key, entry in previous.items() if key not in entries]
+    for entry in removed:
+        remove_output(out_dir, entry)
+
+    elapsed = time.perf_counter() - start
+    print(f"✅ {len(entries):,} snapshots in {out_dir}: {written:,} written, {unchanged:,} unchanged, "
+          f"{len(removed):,} removed ({elapsed:.1f}s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export API responses as static JSON snapshots")
+    parser.add_argument('--out', type=Path,
+                        default=Path(os.environ.get('SNAPSHOT_DIR', Path(__file__).resolve().parent.parent / 'backend' / 'snapshots')))
+    parser.add_argument('--force', action='store_true', help="re-render every snapshot, ignoring the manifest")
+    args = parser.parse_args()
+    asyncio.run(export(args.out, args.force))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Rewrite created_at on stored documents as native BSON dates.
+
+ISO strings (as written by older contact submissions) are parsed, and
+documents with no created_at (the original seed data) get their ObjectId's
+generation time. Work is done in _id order in batches, and the last migrated
+_id per collection is checkpointed in the ``migrations`` collection until
+the collection is finished, so an interrupted run resumes where it stopped:
+
+    python scripts/migrate_created_at.py --batch-size 1000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / 'backend'))
+
+from motor.motor_asyncio import AsyncIOMotorClient  # noqa: E402
+from pymongo import UpdateOne  # noqa: E402
+from cache import bump_cache_version  # noqa: E402
+
+mongo_url = os.environ['MONGO_URL']
+db_name = os.environ['DB_NAME']
+
+COLLECTIONS = ["projects", "team", "news", "contact_forms"]
+MIGRATION_ID = "created_at_bson_date"
+NEEDS_MIGRATION = {"$or": [{"created_at": {"$type": "string"}}, {"created_at": {"$exists": False}}]}
+
+
+def as_datetime(doc) -> datetime:
+    created_at = doc.get("created_at")
+    if isinstance(created_at, str):
+        try:
+            parsed = datetime.fromisoformat(created_at)
+        except ValueError:
+            # One bad row must not stop the run; its _id still dates it
+            print(f"   ⚠️  {doc['_id']}: unparseable created_at {created_at!r}, using the _id's time")
+        else:
+            return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+    return doc["_id"].generation_time
+
+
+async def migrate_collection(db, name, batch_size, dry_run):
+    collection = db[name]
+    checkpoint = await db.migrations.find_one({"_id": MIGRATION_ID})
+    last_id = (checkpoint or {}).get(name)
+    remaining = await collection.count_documents(NEEDS_MIGRATION)
+    print(f"   {name}: {remaining:,} documents to migrate" + (f", resuming after {last_id}" if last_id else ""))
+
+    migrated = 0
+    start = time.perf_counter()
+    while True:
+        query = dict(NEEDS_MIGRATION)
+        if last_id is not None:
+            query = {"$and": [NEEDS_MIGRATION, {"_id": {"$gt": last_id}}]}
+        batch = await collection.find(query, {"_id": 1, "created_at": 1}).sort("_id", 1).to_list(batch_size)
+        if not batch:
+            break
+
+        # Match on the old value so a concurrent rewrite of the document wins
+        requests = [
+            UpdateOne({"_id": doc["_id"], "created_at": doc.get("created_at", {"$exists": False})},
+                      {"$set": {"created_at": as_datetime(doc)}})
+            for doc in batch
+        ]
+        last_id = batch[-1]["_id"]
+        if not dry_run:
+            await collection.bulk_write(requests, ordered=False)
+            await db.migrations.update_one({"_id": MIGRATION_ID}, {"$set": {name: last_id}}, upsert=True)
+
+        migrated += len(batch)
+        elapsed = time.perf_counter() - start
+        print(f"   {name}: {migrated:,}/{remaining:,} ({migrated / elapsed:,.0f} docs/s)", flush=True)
+
+    if not dry_run:
+        # Done; a later run should rescan from the start
+        await db.migrations.update_one({"_id": MIGRATION_ID}, {"$unset": {name: ""}})
+        if migrated:
+            await bump_cache_version(db, name)
+    return migrated
+
+
+async def migrate(collections, batch_size, dry_run, restart):
+    client = AsyncIOMotorClient(mongo_url)
+    db = client[db_name]
+
+    if restart and not dry_run:
+        await db.migrations.delete_one({"_id": MIGRATION_ID})
+
+    total = 0
+    for name in collections:
+        total += await migrate_collection(db, name, batch_size, dry_run)
+
+    print(f"✅ {'Would migrate' if dry_run else 'Migrated'} {total:,} documents")
+    client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert created_at to BSON dates")
+    parser.add_argument('--collections', nargs='+', default=COLLECTIONS, choices=COLLECTIONS)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--dry-run', action='store_true', help="report what would change without writing")
+    parser.add_argument('--restart', action='store_true', help="ignore the saved checkpoint")
+    args = parser.parse_args()
+    asyncio.run(migrate(args.collections, args.batch_size, args.dry_run, args.restart))
+
+
+if __name__ == "__main__":
+    main()
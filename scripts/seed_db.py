@@ -1,9 +1,19 @@
+import argparse
 import asyncio
+import random
 import sys
 import os
+import time
+from datetime import datetime, timezone
+from itertools import islice
+from pathlib import Path
 # sys.path.append('/app/backend')
+sys.path.append(str(Path(__file__).resolve().parent.parent / 'backend'))
 
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import DeleteMany, ReplaceOne
+from indexes import ensure_indexes
+from cache import bump_cache_version
 # from dotenv import load_dotenv
 # from pathlib import Path
 
@@ -13,14 +23,43 @@ from motor.motor_asyncio import AsyncIOMotorClient
 mongo_url = os.environ['MONGO_URL']
 db_name = os.environ['DB_NAME']
 
-async def seed_database():
+CATEGORIES = ["Featured", "Upcoming", "Under Construction", "Completed", "Affordable Housing"]
+STREETS = ["Summit Avenue", "Van Wagenen Avenue", "Oakland Avenue", "Cottage Street", "Giles Avenue", "Terrace Avenue",
+           "Logan Avenue", "Lake Street", "Congress Street", "Hopkins Avenue", "Clifton Place", "Kennedy Boulevard"]
+CITIES = ["Jersey City", "Bayonne", "Newark", "Hoboken"]
+WORDS = ("development residential amenities community housing tower rental units luxury workforce affordable "
+         "construction completed neighborhood transit park design innovation Jersey City families investment "
+         "partnership milestone project residents skyline corridor revitalization sustainable").split()
+
+
+def stamp_created_at(docs):
+    # Stored as a BSON date so the API can serve documents without re-parsing
+    now = datetime.now(timezone.utc)
+    for doc in docs:
+        doc.setdefault("created_at", now)
+
+
+async def replace_collection(collection, docs, prune=False):
+    """Upsert ``docs`` by id, so the collection is never empty while it is
+    being reseeded. With ``prune``, also drop every document not in the set,
+    including synthetic and admin-added ones."""
+    requests = [ReplaceOne({"id": doc["id"]}, doc, upsert=True) for doc in docs]
+    if prune:
+        requests.append(DeleteMany({"id": {"$nin": [doc["id"] for doc in docs]}}))
+    await collection.bulk_write(requests, ordered=True)
+
+
+async def seed_database(upsert=False, prune=False):
     client = AsyncIOMotorClient(mongo_url)
     db = client[db_name]
     
-    # Clear existing data
-    await db.projects.delete_many({})
-    await db.team.delete_many({})
-    await db.news.delete_many({})
+    if not upsert:
+        # Clear existing data
+        await db.projects.delete_many({})
+        await db.team.delete_many({})
+        await db.news.delete_many({})
+    
+    await ensure_indexes(db)
     
     # Seed Projects
     projects = [
@@ -57,7 +96,11 @@ async def seed_database():
         {"id": "125-lake-affordable", "name": "125 Lake Street Affordable Units", "address": "125 Lake Street, Jersey City", "category": "Affordable Housing", "units": 2, "status": "Reserved for workforce housing", "description": "2 units reserved for workforce housing as part of our commitment to inclusive development."},
     ]
     
-    await db.projects.insert_many(projects)
+    stamp_created_at(projects)
+    if upsert:
+        await replace_collection(db.projects, projects, prune)
+    else:
+        await db.projects.insert_many(projects)
     
     # Seed Team Members (using highest quality images)
     team = [
@@ -91,7 +134,11 @@ async def seed_database():
         }
     ]
     
-    await db.team.insert_many(team)
+    stamp_created_at(team)
+    if upsert:
+        await replace_collection(db.team, team, prune)
+    else:
+        await db.team.insert_many(team)
     
     # Seed News Articles
     news = [
@@ -137,7 +184,15 @@ async def seed_database():
         }
     ]
     
-    await db.news.insert_many(news)
+    stamp_created_at(news)
+    if upsert:
+        await replace_collection(db.news, news, prune)
+    else:
+        await db.news.insert_many(news)
+    
+    # Servers without change streams poll these to drop cached responses
+    for name in ("projects", "team", "news"):
+        await bump_cache_version(db, name)
     
     print("✅ Database seeded successfully!")
     print(f"   - {len(projects)} projects")
@@ -149,5 +204,137 @@ async def seed_database():
     
     client.close()
 
+
+def _sentences(rng, count):
+    return " ".join(
+        " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 20))).capitalize() + "."
+        for _ in range(count)
+    )
+
+
+def synthetic_projects(count, seed=0):
+    rng = random.Random(seed)
+    for i in range(count):
+        street = f"{rng.randint(1, 999)} {rng.choice(STREETS)}"
+        city = rng.choice(CITIES)
+        yield {
+            "id": f"synthetic-project-{i}",
+            "name": street,
+            "address": f"{street}, {city}",
+            "category": rng.choice(CATEGORIES),
+            "units": rng.randint(2, 400),
+            "square_feet": f"{rng.randint(5, 400) * 1000:,}",
+            "year": str(rng.randint(2010, 2030)),
+            "status": rng.choice(["Completed", "Under Construction", "Planned"]),
+            "description": _sentences(rng, rng.randint(2, 6)),
+            "image_url": f"https://images.unsplash.com/photo-{rng.randint(10**12, 10**13 - 1)}?crop=entropy&cs=srgb&fm=jpg&q=85",
+            "created_at": datetime.now(timezone.utc),
+        }
+
+
+def synthetic_news(count, seed=0):
+    rng = random.Random(seed + 1)
+    for i in range(count):
+        yield {
+            "id": f"synthetic-article-{i}",
+            "title": " ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 10))).title(),
+            "date": f"{rng.randint(2010, 2025)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "content": "\n\n".join(_sentences(rng, rng.randint(3, 6)) for _ in range(rng.randint(4, 10))),
+            "short_content": _sentences(rng, 2),
+            "image_url": f"https://images.unsplash.com/photo-{rng.randint(10**12, 10**13 - 1)}?crop=entropy&cs=srgb&fm=jpg&q=85",
+            "created_at": datetime.now(timezone.utc),
+        }
+
+
+async def stream_documents(collection, docs, chunk_size=1000, concurrency=4, upsert=False):
+    """Write ``docs`` in chunks with up to ``concurrency`` batches in flight.
+
+    Only ``concurrency`` chunks are materialized at a time, so memory stays
+    bounded however many documents the generator yields.
+    """
+    slots = asyncio.Semaphore(concurrency)
+    pending = set()
+    errors = []
+    written = 0
+    start = time.perf_counter()
+
+    async def write(chunk):
+        try:
+            if upsert:
+                await collection.bulk_write([ReplaceOne({"id": doc["id"]}, doc, upsert=True) for doc in chunk], ordered=False)
+            else:
+                await collection.insert_many(chunk, ordered=False)
+        except Exception as exc:
+            errors.append(exc)
+        finally:
+            slots.release()
+
+    docs = iter(docs)
+    while not errors:
+        await slots.acquire()
+        chunk = list(islice(docs, chunk_size))
+        if not chunk:
+            slots.release()
+            break
+        task = asyncio.create_task(write(chunk))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+        written += len(chunk)
+        if written % (chunk_size * concurrency * 10) < chunk_size:
+            elapsed = time.perf_counter() - start
+            print(f"   {collection.name}: {written:,} docs, {written / elapsed:,.0f} docs/s", flush=True)
+    await asyncio.gather(*pending)
+    if errors:
+        raise errors[0]
+
+    elapsed = time.perf_counter() - start
+    print(f"✅ {collection.name}: {written:,} docs in {elapsed:.1f}s ({written / elapsed:,.0f} docs/s)")
+    return written
+
+
+async def seed_synthetic(projects, news, chunk_size, concurrency, upsert, seed):
+    client = AsyncIOMotorClient(mongo_url, maxPoolSize=max(100, concurrency * 2))
+    db = client[db_name]
+    
+    if not upsert:
+        await db.projects.delete_many({"id": {"$regex": "^synthetic-"}})
+        await db.news.delete_many({"id": {"$regex": "^synthetic-"}})
+    
+    await ensure_indexes(db)
+    
+    if projects:
+        await stream_documents(db.projects, synthetic_projects(projects, seed), chunk_size, concurrency, upsert)
+    if news:
+        await stream_documents(db.news, synthetic_news(news, seed), chunk_size, concurrency, upsert)
+    
+    for name in ("projects", "news"):
+        await bump_cache_version(db, name)
+    client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed the GN Management database")
+    parser.add_argument('--upsert', action='store_true',
+                        help="upsert by id instead of wiping collections first")
+    parser.add_argument('--prune', action='store_true',
+                        help="with --upsert, also delete documents that are not in the curated seed data")
+    parser.add_argument('--synthetic-projects', type=int, default=0, metavar='N',
+                        help="generate N synthetic projects instead of the curated seed; existing curated documents are kept")
+    parser.add_argument('--synthetic-news', type=int, default=0, metavar='N',
+                        help="generate N synthetic news articles instead of the curated seed; existing curated documents are kept")
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=4, help="insert batches in flight")
+    parser.add_argument('--seed', type=int, default=0, help="random seed for synthetic data")
+    args = parser.parse_args()
+    if args.prune and not args.upsert:
+        parser.error("--prune only applies with --upsert")
+
+    if args.synthetic_projects or args.synthetic_news:
+        asyncio.run(seed_synthetic(args.synthetic_projects, args.synthetic_news,
+                                   args.chunk_size, args.concurrency, args.upsert, args.seed))
+    else:
+        asyncio.run(seed_database(upsert=args.upsert, prune=args.prune))
+
+
 if __name__ == "__main__":
-    asyncio.run(seed_database())
+    main()
@@ -0,0 +1,86 @@
+"""Fails when a route regresses against the merge-base, measured on this machine.
+
+Absolute numbers from another machine say nothing about this one, so the
+baseline is not committed. Instead the merge-base of HEAD and
+``BENCH_BASE_REF`` is checked out into a temporary worktree and both trees
+run their own scripts/bench_api.py with the in-memory fake database,
+alternating for ``BENCH_ROUNDS`` rounds and keeping each scenario's best
+round, so drift and one-off stalls hit both trees alike. Opt in with:
+
+    BENCH_BASE_REF=origin/main python -m pytest tests/test_bench_regression.py
+
+Both runs have the response cache off, so content routes are timed through
+Mongo and serialization. Scenarios the base tree doesn't have are reported
+but not compared.
+"""
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT / 'scripts'))
+BASE_REF = os.environ.get("BENCH_BASE_REF")
+ROUNDS = int(os.environ.get("BENCH_ROUNDS", "3"))
+REQUESTS = os.environ.get("BENCH_REQUESTS", "1000")
+CONCURRENCY = os.environ.get("BENCH_CONCURRENCY", "8")
+THRESHOLD = float(os.environ.get("BENCH_THRESHOLD", "0.4"))
+# p99 over a few hundred sub-millisecond requests is mostly scheduler noise
+P99_THRESHOLD = float(os.environ.get("BENCH_P99_THRESHOLD", "2.0"))
+
+pytestmark = pytest.mark.skipif(not BASE_REF, reason="set BENCH_BASE_REF to benchmark against its merge-base")
+
+
+def git(*args):
+    return subprocess.run(["git", *args], cwd=ROOT, check=True, capture_output=True, text=True).stdout.strip()
+
+
+def bench(tree: Path, output: Path) -> dict:
+    command = [
+        sys.executable, str(tree / "scripts" / "bench_api.py"), "--fake",
+        "--requests", REQUESTS, "--concurrency", CONCURRENCY, "--video-mb", "2",
+        "--save-baseline", str(output),
+    ]
+    env = dict(os.environ, RESPONSE_CACHE_SIZE="0")
+    result = subprocess.run(command, cwd=tree, env=env, capture_output=True, text=True, timeout=900)
+    assert result.returncode == 0, f"{tree} failed:\n" + result.stdout[-4000:] + result.stderr[-4000:]
+    return json.loads(output.read_text())["scenarios"]
+
+
+def best(rounds: list) -> dict:
+    scenarios = {}
+    for results in rounds:
+        for name, result in results.items():
+            kept = scenarios.setdefault(name, dict(result))
+            kept["req_s"] = max(kept["req_s"], result["req_s"])
+            kept["p99_ms"] = min(kept["p99_ms"], result["p99_ms"])
+    return scenarios
+
+
+@pytest.fixture
+def base_tree(tmp_path):
+    base = git("merge-base", "HEAD", BASE_REF)
+    tree = tmp_path / "base"
+    git("worktree", "add", "--detach", str(tree), base)
+    try:
+        if not (tree / "scripts" / "bench_api.py").exists():
+            pytest.skip(f"{base[:10]} predates scripts/bench_api.py")
+        yield tree
+    finally:
+        git("worktree", "remove", "--force", str(tree))
+
+
+def test_routes_do_not_regress(base_tree, tmp_path):
+    from bench_api import compare
+
+    base_rounds, head_rounds = [], []
+    for round in range(ROUNDS):
+        base_rounds.append(bench(base_tree, tmp_path / f"base-{round}.json"))
+        head_rounds.append(bench(ROOT, tmp_path / f"head-{round}.json"))
+    baseline, results = best(base_rounds), best(head_rounds)
+
+    regressions = compare(results, {"scenarios": baseline}, THRESHOLD, P99_THRESHOLD)
+    assert not regressions, "\n".join(regressions)
@@ -0,0 +1,188 @@
+"""Response cache bookkeeping and change detection in backend/cache.py."""
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+from pymongo.errors import OperationFailure
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / 'backend'))
+
+import cache  # noqa: E402
+from cache import ResponseCache, bump_cache_version, watch_collections  # noqa: E402
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache.time, "monotonic", clock)
+    return clock
+
+
+def test_entries_expire_after_ttl(clock):
+    responses = ResponseCache(ttl=60)
+    responses.set(("projects", "list"), "body")
+    clock.now += 59
+    assert responses.get(("projects", "list")) == "body"
+    clock.now += 2
+    assert responses.get(("projects", "list")) is None
+    assert responses.stats()["size"] == 0
+    assert (responses.hits, responses.misses) == (1, 1)
+
+
+def test_least_recently_used_is_evicted():
+    responses = ResponseCache(maxsize=2)
+    responses.set(("projects", "a"), 1)
+    responses.set(("projects", "b"), 2)
+    responses.get(("projects", "a"))
+    responses.set(("projects", "c"), 3)
+    assert responses.get(("projects", "b")) is None
+    assert responses.get(("projects", "a")) == 1
+    assert responses.get(("projects", "c")) == 3
+
+
+def test_zero_size_caches_nothing():
+    responses = ResponseCache(maxsize=0)
+    responses.set(("projects", "a"), 1)
+    assert responses.get(("projects", "a")) is None
+
+
+def test_invalidate_one_collection():
+    responses = ResponseCache()
+    responses.set(("projects", "a"), 1)
+    responses.set(("news", "a"), 2)
+    responses.invalidate("projects")
+    assert responses.get(("projects", "a")) is None
+    assert responses.get(("news", "a")) == 2
+
+    responses.invalidate()
+    assert responses.get(("news", "a")) is None
+    assert responses.invalidations == 2
+
+
+def test_set_after_invalidation_is_dropped():
+    responses = ResponseCache()
+    # A request reads the generation, then queries Mongo...
+    projects, news = responses.generation("projects"), responses.generation("news")
+    # ...while a write to projects lands
+    responses.invalidate("projects")
+    responses.set(("projects", "list"), "stale", projects)
+    responses.set(("news", "list"), "fresh", news)
+    assert responses.get(("projects", "list")) is None
+    assert responses.get(("news", "list")) == "fresh"
+    assert responses.stale_sets == 1
+
+    # A full invalidation makes every older generation stale
+    news = responses.generation("news")
+    responses.invalidate()
+    responses.set(("news", "list"), "stale", news)
+    assert responses.get(("news", "list")) is None
+    assert responses.stale_sets == 2
+
+    responses.set(("news", "list"), "fresh", responses.generation("news"))
+    assert responses.get(("news", "list")) == "fresh"
+
+
+class StandaloneDatabase:
+    """A mongomock database that refuses change streams like a standalone mongod."""
+
+    def __init__(self, db):
+        self.db = db
+
+    def __getitem__(self, name):
+        return self.db[name]
+
+    def watch(self, pipeline):
+        raise OperationFailure("The $changeStream stage is only supported on replica sets", code=40573)
+
+
+def test_polling_detects_inserts_deletes_and_version_bumps():
+    async def main():
+        db = mongomock_motor.AsyncMongoMockClient()["test"]
+        await db.projects.insert_one({"id": "p1"})
+        responses = ResponseCache()
+        changes = []
+        watcher = asyncio.create_task(watch_collections(
+            StandaloneDatabase(db), responses, ["projects", "news"], poll_interval=0.01,
+            on_change=lambda name, change: changes.append((name, change)),
+        ))
+
+        async def settle():
+            # A few poll rounds, so a change has been seen and compared
+            await asyncio.sleep(0.1)
+
+        try:
+            await settle()
+            assert changes == []
+
+            await db.projects.insert_one({"id": "p2"})
+            await settle()
+            assert changes == [("projects", None)]
+
+            # Updated in place: neither the count nor the newest _id moves
+            await db.projects.update_one({"id": "p1"}, {"$set": {"name": "renamed"}})
+            await settle()
+            assert len(changes) == 1
+            await bump_cache_version(db, "projects")
+            await settle()
+            assert changes[1:] == [("projects", None)]
+
+            await db.projects.delete_one({"id": "p1"})
+            await settle()
+            assert changes[2:] == [("projects", None)]
+        finally:
+            watcher.cancel()
+
+    asyncio.run(main())
+
+
+def test_polling_invalidates_the_cache():
+    async def main():
+        db = mongomock_motor.AsyncMongoMockClient()["test"]
+        responses = ResponseCache()
+        responses.set(("news", "list"), "body")
+        watcher = asyncio.create_task(watch_collections(StandaloneDatabase(db), responses, ["news"], poll_interval=0.01))
+        try:
+            await asyncio.sleep(0.05)
+            assert responses.get(("news", "list")) == "body"
+            await db.news.insert_one({"id": "n1"})
+            await asyncio.sleep(0.05)
+            assert responses.get(("news", "list")) is None
+        finally:
+            watcher.cancel()
+
+    asyncio.run(main())
+
+
+def test_unexpected_stream_error_falls_back_to_polling():
+    class BrokenStreams(StandaloneDatabase):
+        def watch(self, pipeline):
+            raise OperationFailure("not authorized on admin to execute command", code=13)
+
+    async def main():
+        db = mongomock_motor.AsyncMongoMockClient()["test"]
+        changes = []
+        watcher = asyncio.create_task(watch_collections(
+            BrokenStreams(db), ResponseCache(), ["news"], poll_interval=0.01,
+            on_change=lambda name, change: changes.append(name),
+        ))
+        try:
+            await asyncio.sleep(0.05)
+            assert not watcher.done()
+            await db.news.insert_one({"id": "n1"})
+            await asyncio.sleep(0.05)
+            assert changes == ["news"]
+        finally:
+            watcher.cancel()
+
+    asyncio.run(main())
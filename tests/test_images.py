@@ -0,0 +1,93 @@
+"""Disk cache and proxy behaviour of backend/images.py."""
+import asyncio
+import io
+import sys
+from pathlib import Path
+
+from PIL import Image
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / 'backend'))
+
+from images import DiskLRUCache, ImageProxy  # noqa: E402
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def jpeg(width: int, height: int) -> bytes:
+    out = io.BytesIO()
+    Image.new("RGB", (width, height), (90, 120, 150)).save(out, "JPEG")
+    return out.getvalue()
+
+
+def test_evicts_least_recently_used(tmp_path):
+    async def main():
+        cache = DiskLRUCache(tmp_path, max_bytes=250)
+        cache.load()
+        for name in ("a", "b", "c"):
+            await cache.put(name, b"x" * 100)
+        # Over budget after c, so a (least recently used) goes
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["b", "c"]
+        assert cache.get("b") is not None
+        await cache.put("d", b"x" * 100)
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["b", "d"]
+        assert cache.stats()["bytes"] == 200
+
+    run(main())
+
+
+def test_keeps_a_file_larger_than_the_budget(tmp_path):
+    async def main():
+        cache = DiskLRUCache(tmp_path, max_bytes=10)
+        cache.load()
+        path = await cache.put("big", b"x" * 100)
+        assert path.read_bytes() == b"x" * 100
+
+    run(main())
+
+
+def test_recency_survives_a_restart(tmp_path):
+    async def main():
+        cache = DiskLRUCache(tmp_path, max_bytes=1000)
+        cache.load()
+        for name in ("a", "b"):
+            await cache.put(name, b"x" * 100)
+        await asyncio.sleep(0.01)
+        cache.get("a")
+
+        restarted = DiskLRUCache(tmp_path, max_bytes=150)
+        restarted.load()
+        assert [p.name for p in tmp_path.iterdir()] == ["a"]
+
+    run(main())
+
+
+def test_variant_evicted_before_it_is_read_is_rendered_again(tmp_path):
+    sources = tmp_path / "sources"
+    (sources / "project").mkdir(parents=True)
+    (sources / "project" / "p1.jpg").write_bytes(jpeg(800, 600))
+
+    async def main():
+        proxy = ImageProxy(DiskLRUCache(tmp_path / "cache", max_bytes=10 * 2**20), source_dir=sources, workers=1)
+        proxy.start()
+        try:
+            variant, calls = proxy.variant, []
+
+            async def evicted_once(*args):
+                path = await variant(*args)
+                calls.append(path)
+                if len(calls) == 1:
+                    # Another process sharing the directory evicts it before the read
+                    path.unlink()
+                return path
+
+            proxy.variant = evicted_once
+            path, body = await proxy.variant_bytes("project", "p1", "unused", 320, "jpeg")
+            assert len(calls) == 2
+            assert path.exists()
+            assert Image.open(io.BytesIO(body)).size == (320, 240)
+        finally:
+            proxy.shutdown()
+
+    run(main())
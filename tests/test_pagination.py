@@ -0,0 +1,90 @@
+"""Cursor and ``fields=`` parsing for backend/pagination.py."""
+import base64
+import sys
+from pathlib import Path
+from typing import Optional
+
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+from pydantic import BaseModel
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / 'backend'))
+
+from pagination import (  # noqa: E402
+    decode_cursor, encode_cursor, mongo_projection, object_id_from_cursor, parse_fields,
+)
+
+
+class Article(BaseModel):
+    id: str
+    title: str
+    date: Optional[str] = None
+    content: Optional[str] = None
+
+
+def raw_cursor(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def assert_bad_request(call, *args):
+    with pytest.raises(HTTPException) as excinfo:
+        call(*args)
+    assert excinfo.value.status_code == 400
+    return excinfo.value
+
+
+@pytest.mark.parametrize("values", [
+    ["65a1b2c3d4e5f60718293a4b"],
+    ["2024-03-01", "news-12"],
+    # Characters that need escaping in JSON and padding in base64
+    ['a"b\\c', "ü/?+="],
+])
+def test_cursor_round_trip(values):
+    cursor = encode_cursor(values)
+    assert "=" not in cursor
+    assert decode_cursor(cursor, len(values)) == values
+
+
+@pytest.mark.parametrize("cursor", [
+    "***",
+    "not base64",
+    raw_cursor(b"\xff\xfe"),
+    raw_cursor(b"{not json"),
+    raw_cursor(b'{"a": "b"}'),
+    raw_cursor(b'"2024-03-01"'),
+    raw_cursor(b"[1]"),
+    raw_cursor(b"[null]"),
+    raw_cursor(b'["a", "b"]'),
+    raw_cursor(b"[]"),
+])
+def test_decode_cursor_rejects_malformed(cursor):
+    assert assert_bad_request(decode_cursor, cursor, 1).detail == "Invalid cursor"
+
+
+def test_object_id_from_cursor():
+    object_id = ObjectId()
+    assert object_id_from_cursor(encode_cursor([str(object_id)])) == object_id
+    assert_bad_request(object_id_from_cursor, encode_cursor(["not-an-object-id"]))
+    assert_bad_request(object_id_from_cursor, encode_cursor([str(object_id), "extra"]))
+
+
+def test_parse_fields():
+    assert parse_fields(None, Article) is None
+    assert parse_fields("", Article) is None
+    # id is always included, and the order is the model's, not the request's
+    assert parse_fields("content,title", Article) == ["id", "title", "content"]
+    assert parse_fields(" date , ,date,id", Article) == ["id", "date"]
+
+
+def test_parse_fields_rejects_unknown():
+    error = assert_bad_request(parse_fields, "title,secret,_id", Article)
+    assert error.detail == "Unknown fields: _id, secret"
+
+
+def test_mongo_projection():
+    assert mongo_projection(None) == {"_id": 0}
+    assert mongo_projection(None, ["_id"]) == {}
+    assert mongo_projection(["id", "title"]) == {"id": 1, "title": 1, "_id": 0}
+    assert mongo_projection(["id"], ["_id"]) == {"id": 1, "_id": 1}
+    assert mongo_projection(["id"], ["date"]) == {"id": 1, "date": 1, "_id": 0}
@@ -0,0 +1,111 @@
+"""Content-coding negotiation and ETags of backend/precomputed.py."""
+import gzip
+import sys
+from pathlib import Path
+
+import pytest
+from starlette.requests import Request
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / 'backend'))
+
+import precomputed  # noqa: E402
+from precomputed import (  # noqa: E402
+    COMPRESS_MIN_SIZE, EncodedResponse, accepted_encodings, coded_etag, encoded_response, etag_matches,
+)
+
+BODY = b'{"items": [' + b'"x", ' * COMPRESS_MIN_SIZE + b'"x"]}'
+
+
+class FakeBrotli:
+    @staticmethod
+    def compress(body, quality):
+        return b"br:" + body
+
+
+@pytest.fixture
+def encoded(monkeypatch):
+    monkeypatch.setattr(precomputed, "brotli", FakeBrotli)
+    return EncodedResponse(BODY)
+
+
+def request(**headers) -> Request:
+    raw = [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()]
+    return Request({"type": "http", "method": "GET", "path": "/api/projects", "headers": raw})
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("", set()),
+    ("gzip, br", {"gzip", "br"}),
+    ("GZIP;q=0.5, deflate", {"gzip", "deflate"}),
+    ("gzip;q=0, br", {"br"}),
+    ("gzip; q=0.000, br;Q=0", set()),
+    ("gzip, , br", {"gzip", "br"}),
+    ("gzip;q=0.01", {"gzip"}),
+])
+def test_accepted_encodings(header, expected):
+    assert accepted_encodings(header) == expected
+
+
+def test_coded_etags_are_distinct():
+    assert coded_etag('"abc"', "gzip") == '"abc-gz"'
+    assert coded_etag('"abc"', "br") == '"abc-br"'
+
+
+@pytest.mark.parametrize("if_none_match", [
+    '"abc"',
+    'W/"abc"',
+    '"abc-gz"',
+    'W/"abc-br"',
+    '"other", "abc-gz"',
+    "*",
+])
+def test_etag_matches_any_coding_of_the_same_body(if_none_match):
+    assert etag_matches(if_none_match, '"abc"')
+    assert etag_matches(if_none_match, '"abc-br"')
+
+
+@pytest.mark.parametrize("if_none_match", ['"other"', '"abc-gz-gz"', '"ab"', '"abc-zz"'])
+def test_etag_mismatches(if_none_match):
+    assert not etag_matches(if_none_match, '"abc"')
+
+
+def test_each_coding_has_its_own_etag(encoded):
+    identity = encoded_response(request(), encoded)
+    gzipped = encoded_response(request(accept_encoding="gzip"), encoded)
+    brotli = encoded_response(request(accept_encoding="gzip, br"), encoded)
+
+    assert identity.body == BODY and "content-encoding" not in identity.headers
+    assert gzip.decompress(gzipped.body) == BODY and gzipped.headers["content-encoding"] == "gzip"
+    assert brotli.body == b"br:" + BODY and brotli.headers["content-encoding"] == "br"
+    etags = [response.headers["etag"] for response in (identity, gzipped, brotli)]
+    assert etags == [encoded.etag, coded_etag(encoded.etag, "gzip"), coded_etag(encoded.etag, "br")]
+    assert all(response.headers["vary"] == "Accept-Encoding" for response in (identity, gzipped, brotli))
+
+
+def test_refused_coding_is_not_used(encoded):
+    response = encoded_response(request(accept_encoding="br;q=0, gzip"), encoded)
+    assert response.headers["content-encoding"] == "gzip"
+    response = encoded_response(request(accept_encoding="gzip;q=0"), encoded)
+    assert "content-encoding" not in response.headers
+    assert response.headers["etag"] == encoded.etag
+
+
+def test_small_bodies_are_not_compressed():
+    small = EncodedResponse(b'{"id": "x"}')
+    response = encoded_response(request(accept_encoding="gzip, br"), small)
+    assert response.body == b'{"id": "x"}'
+    assert response.headers["etag"] == small.etag
+
+
+def test_not_modified_across_codings(encoded):
+    # A cache that stored the gzip variant revalidates with its tag, then asks for br
+    gz_tag = coded_etag(encoded.etag, "gzip")
+    response = encoded_response(request(accept_encoding="br", if_none_match=gz_tag), encoded)
+    assert response.status_code == 304
+    assert response.body == b""
+    assert response.headers["etag"] == coded_etag(encoded.etag, "br")
+    assert "content-encoding" not in response.headers
+
+    for if_none_match in ("*", f'W/{encoded.etag}'):
+        assert encoded_response(request(if_none_match=if_none_match), encoded).status_code == 304
+    assert encoded_response(request(if_none_match='"stale"'), encoded).status_code == 200
@@ -0,0 +1,206 @@
+"""Ranking and incremental updates of the BM25 index in backend/search.py."""
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / 'backend'))
+
+from search import SEARCHABLE, SearchIndex, tokenize  # noqa: E402
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+PROJECTS = [
+    {"id": "summit", "name": "628 Summit Avenue", "address": "628 Summit Avenue, Jersey City",
+     "description": "A 30-story tower with a public park."},
+    {"id": "oakland", "name": "68 Oakland Avenue", "address": "68 Oakland Avenue, Jersey City",
+     "description": "Mid-rise rentals a short walk from Summit Avenue."},
+    {"id": "cottage", "name": "96 Cottage Street", "address": "96 Cottage Street, Jersey City",
+     "description": "Townhouses on a quiet street."},
+]
+NEWS = [
+    {"id": "tower-topped", "title": "Singh Tower tops out", "short_content": "The Summit Avenue tower reaches 30 stories.",
+     "content": "Construction crews placed the final beam."},
+]
+
+
+def names(results):
+    return [result["id"] for result in results]
+
+
+def build(projects=PROJECTS, news=NEWS) -> SearchIndex:
+    index = SearchIndex()
+    for collection, docs in (("projects", projects), ("news", news)):
+        kind, title_field, snippet_field, weights = SEARCHABLE[collection]
+        for doc in docs:
+            index.add(kind, doc, weights, title_field, snippet_field)
+    return index
+
+
+def test_tokenize_drops_stopwords_and_punctuation():
+    assert tokenize("The Tower, at 628 Summit-Avenue!") == ["tower", "628", "summit", "avenue"]
+
+
+def test_title_matches_outrank_description_matches():
+    results = build().search("summit", kind="project", prefix=False)
+    # Both mention Summit; only one has it in the (heavier) name and address
+    assert names(results) == ["summit", "oakland"]
+    assert results[0]["score"] > results[1]["score"]
+    assert results[0]["title"] == "628 Summit Avenue"
+    assert results[0]["snippet"] == "628 Summit Avenue, Jersey City"
+
+
+def test_rare_terms_weigh_more():
+    # "avenue" is in two of four documents, "quiet" in one
+    results = build().search("avenue quiet", prefix=False)
+    assert names(results)[0] == "cottage"
+
+
+def test_last_term_is_prefix_matched():
+    index = build()
+    assert set(names(index.search("tow"))) == {"summit", "cottage", "tower-topped"}
+    assert index.search("tow", prefix=False) == []
+    # Only the last term is a prefix: "tow" alone doesn't match "townhouses"
+    assert "cottage" not in names(index.search("tow summit"))
+    assert "cottage" in names(index.search("summit tow"))
+
+
+def test_kind_filter_and_limit():
+    index = build()
+    assert names(index.search("tower", kind="news")) == ["tower-topped"]
+    assert {result["kind"] for result in index.search("avenue", kind="project")} == {"project"}
+    assert len(index.search("avenue", limit=1)) == 1
+
+
+def test_empty_queries():
+    index = build()
+    assert index.search("the of") == []
+    assert index.search("zzz") == []
+    assert SearchIndex().search("summit") == []
+
+
+def test_readding_replaces_a_document():
+    index = build()
+    kind, title_field, snippet_field, weights = SEARCHABLE["projects"]
+    index.add(kind, dict(PROJECTS[0]), weights, title_field, snippet_field)
+    assert len(index) == 4
+    assert names(index.search("summit", kind="project", prefix=False)) == ["summit", "oakland"]
+
+    index.add(kind, dict(PROJECTS[0], name="Singh Tower", address="Bergen Arches"), weights, title_field, snippet_field)
+    assert len(index) == 4
+    assert names(index.search("summit", kind="project", prefix=False)) == ["oakland"]
+    assert names(index.search("arches", prefix=False)) == ["summit"]
+
+
+def change(operation, object_id):
+    return {"operationType": operation, "documentKey": {"_id": object_id}}
+
+
+class Harness:
+    """A running SearchIndex over a mongomock database."""
+
+    def __init__(self):
+        self.db = mongomock_motor.AsyncMongoMockClient()["test"]
+        self.index = SearchIndex()
+        self.rescans = 0
+
+    async def start(self):
+        await self.db.projects.insert_many([dict(doc) for doc in PROJECTS])
+        await self.db.news.insert_many([dict(doc) for doc in NEWS])
+        refresh = self.index.refresh
+
+        async def counting_refresh(db, collection):
+            self.rescans += 1
+            await refresh(db, collection)
+
+        self.index.refresh = counting_refresh
+        self.task = asyncio.create_task(self.index.run(self.db, debounce=0))
+        while not self.index.built:
+            await asyncio.sleep(0.01)
+        self.rescans = 0
+
+    async def notify(self, collection, event=None):
+        self.index.mark_dirty(collection, event)
+        await asyncio.sleep(0.05)
+
+    def search(self, query, **kwargs):
+        return names(self.index.search(query, prefix=False, **kwargs))
+
+
+def run_harness(test):
+    async def main():
+        harness = Harness()
+        await harness.start()
+        try:
+            await test(harness)
+        finally:
+            harness.task.cancel()
+
+    asyncio.run(main())
+
+
+def test_builds_from_the_database():
+    async def test(harness):
+        assert len(harness.index) == 4
+        assert harness.search("summit", kind="project") == ["summit", "oakland"]
+
+    run_harness(test)
+
+
+def test_insert_event_indexes_just_that_document():
+    async def test(harness):
+        result = await harness.db.projects.insert_one({"id": "giles", "name": "Giles Avenue Lofts", "address": "Giles Avenue"})
+        await harness.notify("projects", change("insert", result.inserted_id))
+        assert harness.search("lofts") == ["giles"]
+        assert harness.rescans == 0
+
+    run_harness(test)
+
+
+def test_update_event_replaces_the_old_text():
+    async def test(harness):
+        doc = await harness.db.news.find_one({"id": "tower-topped"})
+        await harness.db.news.update_one({"_id": doc["_id"]}, {"$set": {"title": "Singh Tower opens"}})
+        await harness.notify("news", change("update", doc["_id"]))
+        assert harness.search("opens") == ["tower-topped"]
+        assert harness.search("tops") == []
+        assert harness.rescans == 0
+
+    run_harness(test)
+
+
+def test_delete_event_removes_the_document():
+    async def test(harness):
+        doc = await harness.db.projects.find_one({"id": "cottage"})
+        await harness.db.projects.delete_one({"_id": doc["_id"]})
+        # The event only carries the _id; the index resolves it to the document's key
+        await harness.notify("projects", change("delete", doc["_id"]))
+        assert harness.search("cottage") == []
+        assert len(harness.index) == 3
+        assert harness.rescans == 0
+
+    run_harness(test)
+
+
+def test_id_change_drops_the_old_key():
+    async def test(harness):
+        doc = await harness.db.projects.find_one({"id": "oakland"})
+        await harness.db.projects.update_one({"_id": doc["_id"]}, {"$set": {"id": "68-oakland"}})
+        await harness.notify("projects", change("update", doc["_id"]))
+        assert harness.search("oakland") == ["68-oakland"]
+        assert len(harness.index) == 4
+
+    run_harness(test)
+
+
+def test_change_without_an_event_rescans():
+    async def test(harness):
+        await harness.db.projects.delete_many({"id": {"$in": ["summit", "oakland"]}})
+        # Polling only knows that the collection changed
+        await harness.notify("projects")
+        assert harness.rescans == 1
+        assert harness.search("avenue", kind="project") == []
+        assert harness.search("cottage") == ["cottage"]
+
+    run_harness(test)
@@ -0,0 +1,171 @@
+"""Snapshot keys, the manifest-driven store and incremental export."""
+import asyncio
+import hashlib
+import json
+import os
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT / 'backend'))
+sys.path.append(str(ROOT / 'scripts'))
+
+from snapshots import MANIFEST_NAME, SnapshotStore, snapshot_file, snapshot_key  # noqa: E402
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+pytest.importorskip("httpx")
+
+
+@pytest.mark.parametrize("path, params, key", [
+    ("/api/team", [], "/api/team"),
+    # Parameters are sorted, so equivalent queries share a key
+    ("/api/projects", [("fields", "id,name"), ("category", "Featured")], "/api/projects?category=Featured&fields=id%2Cname"),
+    ("/api/projects", [("category", "Under Construction")], "/api/projects?category=Under%20Construction"),
+])
+def test_snapshot_key(path, params, key):
+    assert snapshot_key(path, params) == key
+
+
+@pytest.mark.parametrize("key, file", [
+    ("/api/team", "api/team.json"),
+    ("/api/projects?category=Featured", "api/projects@category=Featured.json"),
+    ("/api/projects?category=Under%20Construction&fields=id%2Cname", "api/projects@category=Under%20Construction&fields=id%2Cname.json"),
+    ("/api/news/a/b", "api/news/a/b.json"),
+    ("/api/news/a%2Fb", "api/news/a%252Fb.json"),
+    # Ids that would climb out of the snapshot directory
+    ("/api/news/..", "api/news/%2E..json"),
+    ("/api/news/.", "api/news/%2E.json"),
+    ("/api/news/.hidden", "api/news/%2Ehidden.json"),
+])
+def test_snapshot_file(key, file):
+    assert snapshot_file(key) == file
+    assert ".." not in Path(file).parts
+
+
+def write_snapshot(directory: Path, key: str, body: bytes, sha256: str = None) -> None:
+    file = snapshot_file(key)
+    (directory / file).parent.mkdir(parents=True, exist_ok=True)
+    (directory / file).write_bytes(body)
+    manifest = {"version": 1, "entries": {key: {
+        "file": file, "sha256": sha256 or hashlib.sha256(body).hexdigest(), "encodings": [], "headers": {},
+    }}}
+    (directory / MANIFEST_NAME).write_text(json.dumps(manifest))
+
+
+def test_store_serves_manifest_entries(tmp_path):
+    write_snapshot(tmp_path, "/api/team", b'[{"id":"t1"}]')
+    store = SnapshotStore(tmp_path, revalidate=0)
+
+    async def main():
+        encoded = await store.get("/api/team")
+        assert encoded.body == b'[{"id":"t1"}]'
+        assert await store.get("/api/team", [("limit", "5")]) is None
+        assert await store.get("/api/news") is None
+
+    asyncio.run(main())
+    assert store.stats()["fallbacks"] == 2
+
+
+def test_store_falls_back_on_a_hash_mismatch(tmp_path):
+    # A re-export has replaced the file but not yet the manifest
+    write_snapshot(tmp_path, "/api/team", b'[{"id":"t2"}]', sha256=hashlib.sha256(b"older").hexdigest())
+    store = SnapshotStore(tmp_path, revalidate=0)
+    assert asyncio.run(store.get("/api/team")) is None
+    assert store.stats()["fallbacks"] == 1
+
+
+def test_store_ignores_unknown_manifest_versions(tmp_path):
+    (tmp_path / MANIFEST_NAME).write_text(json.dumps({"version": 99, "entries": {"/api/team": {}}}))
+    store = SnapshotStore(tmp_path, revalidate=0)
+    assert len(store) == 0
+    assert asyncio.run(store.get("/api/team")) is None
+
+
+CREATED = datetime(2024, 1, 1, tzinfo=timezone.utc)
+PROJECTS = [
+    {"id": "628-summit", "name": "628 Summit Avenue", "address": "Jersey City", "category": "Featured",
+     "description": "Flagship tower.", "created_at": CREATED},
+    {"id": "68-oakland", "name": "68 Oakland Avenue", "address": "Jersey City", "category": "Featured", "created_at": CREATED},
+    {"id": "96-cottage", "name": "96 Cottage Street", "address": "Jersey City", "category": "Completed", "created_at": CREATED},
+]
+TEAM = [{"id": "t1", "name": "Pat", "role": "CEO", "bio": "Founder.", "created_at": CREATED}]
+NEWS = [{"id": "n1", "title": "Topped out", "date": "2024-05-01", "content": "Done.", "created_at": CREATED}]
+
+
+@pytest.fixture
+def exporter(monkeypatch):
+    monkeypatch.setenv("MONGO_URL", os.environ.get("MONGO_URL", "mongodb://snapshot-test"))
+    monkeypatch.setenv("DB_NAME", os.environ.get("DB_NAME", "snapshot_test"))
+    import export_snapshots
+    import server
+
+    fake = mongomock_motor.AsyncMongoMockClient()
+    fake.close = lambda: None
+    db = fake[os.environ["DB_NAME"]]
+    monkeypatch.setattr(export_snapshots, "AsyncIOMotorClient", lambda *args, **kwargs: fake)
+    monkeypatch.setattr(export_snapshots, "db_name", os.environ["DB_NAME"])
+
+    written = []
+    write_output = export_snapshots.write_output
+
+    def recording_write_output(out_dir, key, encoded):
+        written.append(key)
+        return write_output(out_dir, key, encoded)
+
+    monkeypatch.setattr(export_snapshots, "write_output", recording_write_output)
+    monkeypatch.setattr(server, "db", db)
+    server.response_cache.invalidate()
+    return export_snapshots, server, db, written
+
+
+def test_export_rewrites_only_changed_outputs(exporter, tmp_path):
+    from starlette.testclient import TestClient
+
+    export_snapshots, server, db, written = exporter
+
+    async def seed():
+        await db.projects.insert_many([dict(doc) for doc in PROJECTS])
+        await db.team.insert_many([dict(doc) for doc in TEAM])
+        await db.news.insert_many([dict(doc) for doc in NEWS])
+
+    asyncio.run(seed())
+    asyncio.run(export_snapshots.export(tmp_path, force=False))
+    manifest = json.loads((tmp_path / MANIFEST_NAME).read_text())["entries"]
+    assert set(written) == set(manifest)
+    assert {"/api/team", "/api/projects", "/api/projects/628-summit", "/api/news/n1"} <= set(manifest)
+
+    written.clear()
+    asyncio.run(export_snapshots.export(tmp_path, force=False))
+    assert written == []
+
+    # description is only in the full list and detail, not the fields= variants
+    asyncio.run(db.projects.update_one({"id": "628-summit"}, {"$set": {"description": "Thirty stories."}}))
+    written.clear()
+    asyncio.run(export_snapshots.export(tmp_path, force=False))
+    assert sorted(written) == sorted([
+        "/api/projects",
+        snapshot_key("/api/projects", [("category", "Featured")]),
+        "/api/projects/628-summit",
+    ])
+    manifest = json.loads((tmp_path / MANIFEST_NAME).read_text())["entries"]
+
+    client = TestClient(server.app)
+    for key in written + ["/api/team"]:
+        live = client.get(key)
+        assert live.status_code == 200
+
+        # Served from the snapshot, the response is the one Mongo would give
+        store = SnapshotStore(tmp_path, revalidate=0)
+        server.snapshot_store = store
+        try:
+            snapshot = client.get(key)
+            revalidated = client.get(key, headers={"If-None-Match": snapshot.headers["etag"]})
+        finally:
+            server.snapshot_store = None
+        assert store.stats()["hits"] + store.stats()["loads"] == 2
+        assert snapshot.content == live.content
+        assert snapshot.headers["etag"] == live.headers["etag"] == manifest[key]["etag"]
+        assert revalidated.status_code == 304
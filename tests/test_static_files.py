@@ -0,0 +1,141 @@
+"""Range parsing and conditional requests for backend/static_files.py."""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / 'backend'))
+
+from starlette.applications import Starlette  # noqa: E402
+from starlette.routing import Route  # noqa: E402
+from static_files import CachedFile, parse_ranges, ranged_file_response  # noqa: E402
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-99", [(0, 99)]),
+    ("bytes=100-", [(100, 999)]),
+    ("bytes=-100", [(900, 999)]),
+    # A suffix longer than the file is the whole file
+    ("bytes=-5000", [(0, 999)]),
+    # Ends past the file are clamped
+    ("bytes=990-5000", [(990, 999)]),
+    ("BYTES = 0-0", [(0, 0)]),
+    # Overlapping and adjacent ranges are coalesced, in order
+    ("bytes=500-599,0-99,50-149", [(0, 149), (500, 599)]),
+    ("bytes=0-99,100-199", [(0, 199)]),
+    ("bytes=0-9, 20-29", [(0, 9), (20, 29)]),
+    # Unsatisfiable parts are dropped
+    ("bytes=0-9,5000-6000", [(0, 9)]),
+])
+def test_parse_ranges(header, expected):
+    assert parse_ranges(header, 1000) == expected
+
+
+@pytest.mark.parametrize("header", [
+    "bytes=1000-",
+    "bytes=99999999-",
+    "bytes=-0",
+    "bytes=1000-1100,2000-",
+])
+def test_parse_ranges_unsatisfiable(header):
+    assert parse_ranges(header, 1000) == []
+
+
+@pytest.mark.parametrize("header", [
+    "items=0-9",
+    "bytes=",
+    "bytes=abc-",
+    "bytes=0-x",
+    "bytes=10",
+    "bytes=9-0",
+    "bytes=" + ",".join(f"{n * 10}-{n * 10}" for n in range(17)),
+])
+def test_parse_ranges_ignored(header):
+    assert parse_ranges(header, 1000) is None
+
+
+def test_parse_ranges_empty_file():
+    assert parse_ranges("bytes=0-", 0) == []
+    assert parse_ranges("bytes=-10", 0) == []
+
+
+CONTENT = bytes(range(256)) * 4
+
+
+@pytest.fixture
+def client(tmp_path):
+    # The test client needs httpx; parse_ranges above does not
+    pytest.importorskip("httpx")
+    from starlette.testclient import TestClient
+
+    path = tmp_path / "video.mp4"
+    path.write_bytes(CONTENT)
+    cached = CachedFile(path, "video/mp4")
+
+    async def video(request):
+        return ranged_file_response(request, cached)
+
+    app = Starlette(routes=[Route("/video.mp4", video, methods=["GET", "HEAD"])])
+    with TestClient(app) as client:
+        yield client
+
+
+def test_full_response(client):
+    response = client.get("/video.mp4")
+    assert response.status_code == 200
+    assert response.content == CONTENT
+    assert response.headers["accept-ranges"] == "bytes"
+    assert response.headers["content-length"] == str(len(CONTENT))
+
+
+def test_single_range(client):
+    response = client.get("/video.mp4", headers={"Range": "bytes=-24"})
+    assert response.status_code == 206
+    assert response.content == CONTENT[-24:]
+    assert response.headers["content-range"] == f"bytes {len(CONTENT) - 24}-{len(CONTENT) - 1}/{len(CONTENT)}"
+
+
+def test_multiple_ranges(client):
+    response = client.get("/video.mp4", headers={"Range": "bytes=0-9,100-109"})
+    assert response.status_code == 206
+    assert response.headers["content-type"].startswith("multipart/byteranges; boundary=")
+    assert int(response.headers["content-length"]) == len(response.content)
+    assert CONTENT[0:10] in response.content
+    assert CONTENT[100:110] in response.content
+    assert b"Content-Range: bytes 100-109/1024" in response.content
+
+
+def test_unsatisfiable_range(client):
+    response = client.get("/video.mp4", headers={"Range": "bytes=99999999-"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(CONTENT)}"
+
+
+def test_head_has_no_body(client):
+    response = client.head("/video.mp4", headers={"Range": "bytes=0-9"})
+    assert response.status_code == 206
+    assert response.headers["content-length"] == "10"
+    assert response.content == b""
+
+
+def test_if_none_match(client):
+    etag = client.get("/video.mp4").headers["etag"]
+    assert client.get("/video.mp4", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/video.mp4", headers={"If-None-Match": "W/" + etag}).status_code == 304
+    assert client.get("/video.mp4", headers={"If-None-Match": '"other"'}).status_code == 200
+
+
+def test_if_range(client):
+    first = client.get("/video.mp4")
+    etag, last_modified = first.headers["etag"], first.headers["last-modified"]
+
+    for validator in (etag, last_modified):
+        response = client.get("/video.mp4", headers={"Range": "bytes=0-9", "If-Range": validator})
+        assert response.status_code == 206
+        assert response.content == CONTENT[:10]
+
+    # A stale validator means the client's partial copy is outdated: send it all
+    for validator in ('"stale"', "Thu, 01 Jan 1970 00:00:00 GMT"):
+        response = client.get("/video.mp4", headers={"Range": "bytes=0-9", "If-Range": validator})
+        assert response.status_code == 200
+        assert response.content == CONTENT
@@ -0,0 +1,276 @@
+"""Crash safety of the spooled write-behind queue in backend/write_queue.py."""
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+from bson import json_util
+from pymongo.errors import BulkWriteError
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / 'backend'))
+
+import write_queue  # noqa: E402
+from write_queue import WriteBehindQueue  # noqa: E402
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+DOCUMENT_VALIDATION_FAILURE = 121
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def contact_forms():
+    collection = mongomock_motor.AsyncMongoMockClient()["test"].contact_forms
+    await collection.create_index("id", unique=True)
+    return collection
+
+
+def make_queue(collection, spool, **kwargs):
+    # A long interval, so nothing flushes unless the test asks for it
+    kwargs.setdefault("flush_interval", 60)
+    return WriteBehindQueue(collection, spool, **kwargs)
+
+
+async def crash(queue):
+    """Stop ``queue`` the way a killed process would: no drain, locks released."""
+    queue._task.cancel()
+    try:
+        await queue._task
+    except asyncio.CancelledError:
+        pass
+    queue._spool.close()
+    queue._lock.close()
+
+
+def spooled_ids(path: Path) -> list:
+    return [json_util.loads(line)["id"] for line in path.read_bytes().splitlines() if line.strip()]
+
+
+async def stored_ids(collection) -> list:
+    return sorted(doc["id"] for doc in await collection.find({}).to_list(None))
+
+
+class RejectingCollection:
+    """Inserts like ``collection`` but rejects documents marked ``invalid``,
+    the way a schema validator does."""
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.name = collection.name
+
+    async def insert_many(self, docs, ordered=True):
+        for index, doc in enumerate(docs):
+            if doc.get("invalid"):
+                if index:
+                    await self.collection.insert_many(docs[:index], ordered=ordered)
+                raise BulkWriteError({"writeErrors": [
+                    {"index": index, "code": DOCUMENT_VALIDATION_FAILURE, "errmsg": "Document failed validation"},
+                ]})
+        await self.collection.insert_many(docs, ordered=ordered)
+
+
+def test_replays_unflushed_documents_after_a_crash(tmp_path):
+    spool = tmp_path / "contact_forms.jsonl"
+
+    async def main():
+        collection = await contact_forms()
+        queue = make_queue(collection, spool, batch_size=1000)
+        await queue.start()
+        for n in range(5):
+            await queue.submit({"id": f"c{n}"})
+        # Two batches get flushed, the fifth document is only spooled
+        queue.batch_size = 2
+        await queue._flush_batch()
+        await queue._flush_batch()
+        await crash(queue)
+        assert await stored_ids(collection) == ["c0", "c1", "c2", "c3"]
+        assert int(queue.offset_path.read_text()) > 0
+
+        restarted = make_queue(collection, spool)
+        await restarted.start()
+        # Only the unflushed tail is replayed, thanks to the offset checkpoint
+        assert restarted.stats()["pending"] == 1
+        await restarted.drain()
+        assert await stored_ids(collection) == ["c0", "c1", "c2", "c3", "c4"]
+        assert spool.read_bytes() == b""
+
+    run(main())
+
+
+def test_replay_from_the_start_skips_duplicates(tmp_path):
+    spool = tmp_path / "contact_forms.jsonl"
+
+    async def main():
+        collection = await contact_forms()
+        queue = make_queue(collection, spool)
+        await queue.start()
+        for n in range(3):
+            await queue.submit({"id": f"c{n}"})
+        await crash(queue)
+        # Written to Mongo before the crash, but the offset never advanced
+        await collection.insert_many([{"id": "c0"}, {"id": "c1"}])
+
+        restarted = make_queue(collection, spool)
+        await restarted.start()
+        await restarted.drain()
+        assert await stored_ids(collection) == ["c0", "c1", "c2"]
+        assert restarted.stats()["rejected"] == 0
+        assert restarted.stats()["failures"] == 0
+
+    run(main())
+
+
+def test_drain_right_after_a_wake_up(tmp_path):
+    spool = tmp_path / "contact_forms.jsonl"
+
+    async def main():
+        collection = await contact_forms()
+        queue = make_queue(collection, spool, batch_size=2)
+        await queue.start()
+        await queue.submit({"id": "c0"})
+        # Fills a batch and wakes the flusher in the same tick drain() stops it
+        await queue.submit({"id": "c1"})
+        drain = asyncio.ensure_future(queue.drain())
+        done, _ = await asyncio.wait({drain}, timeout=5)
+        assert drain in done, "drain() hung waiting for the flusher"
+        assert await stored_ids(collection) == ["c0", "c1"]
+
+    run(main())
+
+
+def test_torn_final_line_is_skipped(tmp_path):
+    spool = tmp_path / "contact_forms.jsonl"
+
+    async def main():
+        collection = await contact_forms()
+        queue = make_queue(collection, spool)
+        await queue.start()
+        await queue.submit({"id": "c0"})
+        await crash(queue)
+        # A crash mid-append leaves half a line without a newline
+        with open(spool, "ab") as fh:
+            fh.write(b'{"id": "c1", "mess')
+
+        restarted = make_queue(collection, spool)
+        await restarted.start()
+        assert restarted.stats()["pending"] == 1
+        # The next append must not be glued onto the torn line
+        await restarted.submit({"id": "c2"})
+        await crash(restarted)
+
+        again = make_queue(collection, spool)
+        await again.start()
+        assert again.stats()["pending"] == 2
+        await again.drain()
+        assert await stored_ids(collection) == ["c0", "c2"]
+
+    run(main())
+
+
+def test_compacts_flushed_prefix(tmp_path, monkeypatch):
+    monkeypatch.setattr(write_queue, "COMPACT_MIN_BYTES", 16 * 1024)
+    spool = tmp_path / "contact_forms.jsonl"
+    message = "x" * 200
+
+    async def main():
+        collection = await contact_forms()
+        # Batches are flushed by hand below, so submit() never wakes the flusher
+        queue = make_queue(collection, spool, batch_size=1000)
+        await queue.start()
+        for n in range(200):
+            await queue.submit({"id": f"c{n:03}", "message": message})
+        full_size = spool.stat().st_size
+        queue.batch_size = 10
+        # Everything but the last batch, so the queue never empties and truncates
+        for _ in range(19):
+            await queue._flush_batch()
+        await crash(queue)
+
+        # The flushed prefix was cut out instead of the file growing forever
+        assert spool.stat().st_size < full_size / 2
+        assert spooled_ids(spool)[-10:] == [f"c{n:03}" for n in range(190, 200)]
+
+        restarted = make_queue(collection, spool)
+        await restarted.start()
+        assert restarted.stats()["pending"] == 10
+        await restarted.drain()
+        assert len(await stored_ids(collection)) == 200
+        assert restarted.stats()["flushed"] == 10
+
+    run(main())
+
+
+def test_rejected_document_is_dead_lettered(tmp_path):
+    spool = tmp_path / "contact_forms.jsonl"
+
+    async def main():
+        collection = await contact_forms()
+        queue = make_queue(RejectingCollection(collection), spool)
+        await queue.start()
+        await queue.submit({"id": "c0"})
+        await queue.submit({"id": "c1", "invalid": True})
+        await queue.submit({"id": "c2"})
+        await queue.drain()
+
+        assert await stored_ids(collection) == ["c0", "c2"]
+        assert queue.stats()["rejected"] == 1
+        (entry,) = [json_util.loads(line) for line in queue.rejected_path.read_text().splitlines()]
+        assert entry["doc"]["id"] == "c1"
+        assert entry["code"] == DOCUMENT_VALIDATION_FAILURE
+        assert spool.read_bytes() == b""
+
+    run(main())
+
+
+def test_locked_spool_falls_back_to_a_free_slot(tmp_path):
+    spool = tmp_path / "contact_forms.jsonl"
+
+    async def main():
+        collection = await contact_forms()
+        first = make_queue(collection, spool)
+        second = make_queue(collection, spool)
+        await first.start()
+        await second.start()
+        assert first.spool_path == spool
+        assert second.spool_path == tmp_path / "contact_forms.1.jsonl"
+
+        await first.submit({"id": "c0"})
+        await second.submit({"id": "c1"})
+        # One queue emptying must not truncate the other's spool
+        await first.drain()
+        assert spooled_ids(second.spool_path) == ["c1"]
+        await second.drain()
+        assert await stored_ids(collection) == ["c0", "c1"]
+
+    run(main())
+
+
+def test_adopts_orphaned_spools(tmp_path):
+    spool = tmp_path / "contact_forms.jsonl"
+
+    async def main():
+        collection = await contact_forms()
+        queues = {slot: make_queue(collection, spool, slot=slot) for slot in ("0", "1", "7")}
+        for slot, queue in queues.items():
+            await queue.start()
+            await queue.submit({"id": f"from-{slot}"})
+        # Slots 0 and 1 die; slot 0 comes back, slot 1 never does
+        await crash(queues["0"])
+        await crash(queues["1"])
+        live = queues["7"]
+
+        survivor = make_queue(collection, spool, slot="0")
+        await survivor.start()
+        # Slot 1 is orphaned and adopted; slot 7 is alive and left alone
+        assert survivor.stats()["adopted"] == 1
+        assert not (tmp_path / "contact_forms.1.jsonl").exists()
+        assert spooled_ids(survivor.spool_path) == ["from-0", "from-1"]
+        assert spooled_ids(live.spool_path) == ["from-7"]
+
+        await survivor.drain()
+        await live.drain()
+        assert await stored_ids(collection) == ["from-0", "from-1", "from-7"]
+
+    run(main())